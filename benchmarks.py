@@ -0,0 +1,207 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import numpy as np
+import equations
+import solvers
+import pump_index
+import grid
+import sweep
+import search
+import cache
+import heat_exchangers
+import main
+
+#Files the results are written to and compared against
+results_file = "benchmark_results.json"
+baseline_file = "benchmark_baseline.json"
+
+#A benchmark regresses if it is this much slower than the baseline
+threshold = 0.25
+
+#Seed for the synthetic catalogs, so that every run times the same work
+seed = 0
+
+#Time a function, returning the best time in seconds over the repeats
+def timeit(function, repeats):
+    best = None
+    for i in range(repeats):
+        cache.clear()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+#Synthetic pump catalog with n pumps, with heads and efficiencies in the same range as the built in catalog
+def synthetic_pumps(n, rng):
+    return {
+        "ID": np.asarray([f"P{i}" for i in range(n)]),
+        "RPM": rng.choice([1750, 3500], n),
+        "cost": rng.uniform(5000, 60000, n).round(),
+        "efficiency": rng.uniform(0.6, 0.92, n).round(3),
+        "head": rng.uniform(5, 120, n).round(2),
+    }
+
+#Synthetic heat exchanger catalog with n heat exchangers
+def synthetic_heat_exchangers(n, rng):
+    return {
+        "Design": np.asarray([f"HX{i}" for i in range(n)]),
+        "Cost": rng.uniform(5000, 40000, n).round(),
+        "k": rng.uniform(0.5, 8, n).round(2),
+    }
+
+#Head loss and friction factor, one call at a time and as arrays
+def bench_equations(results, repeats, quick):
+    n = 10000 if quick else 100000
+    rng = np.random.default_rng(seed)
+    lengths = rng.uniform(10, 1000, n)
+    diameters = rng.uniform(0.02, 0.15, n)
+    scalar_n = n // 10
+
+    def scalar():
+        for length, diameter in zip(lengths[:scalar_n].tolist(), diameters[:scalar_n].tolist()):
+            equations.hloss(length, diameter, 0.0001)
+
+    seconds = timeit(scalar, repeats)
+    results["hloss_scalar"] = {"seconds": seconds, "calls": scalar_n, "calls_per_second": scalar_n / seconds}
+    seconds = timeit(lambda: equations.hloss(lengths, diameters, 0.0001), repeats)
+    results["hloss_array"] = {"seconds": seconds, "calls": n, "calls_per_second": n / seconds}
+    seconds = timeit(lambda: equations.friction(lengths, diameters, 0.0001), repeats)
+    results["friction_array"] = {"seconds": seconds, "calls": n, "calls_per_second": n / seconds}
+
+#Slant of section 0 for a design far from the divergence boundary and for the slowest converging design next to it
+def bench_section0(results, repeats, quick):
+    z0, z2, adjacent = main.sections[0]
+    p0 = main.min_pressure / (equations.density * equations.gravity)
+
+    #Find the design next to the divergence boundary on a fine grid of ODs
+    ODs = np.linspace(1, 6, 501)
+    diameter, roughness = solvers.pipe_properties(ODs, 40, "PVC")[:2]
+    length, y, diverged, iterations = solvers.solve_section0_batch(diameter, roughness, p0, z0, adjacent)
+    near = int(np.argmax(np.where(diverged, -1, iterations)))
+    cases = {"far": (float(diameter[-1]), float(roughness)), "near": (float(diameter[near]), float(roughness))}
+
+    solve = solvers.solve_section0.__wrapped__
+    for case, (d, r) in cases.items():
+        for method in ["substitution", "secant"]:
+            seconds = timeit(lambda: solve(d, r, p0, z0, adjacent, False, method), repeats)
+            iterations = solvers.solve_section0_batch([d], [r], [p0], z0, adjacent, method)[3][0]
+            results[f"section0_{method}_{case}"] = {"seconds": seconds, "iterations": int(iterations), "diameter": d}
+
+    #Batch of every design on the grid
+    for method in ["substitution", "secant"]:
+        seconds = timeit(lambda: solvers.solve_section0_batch(diameter, roughness, p0, z0, adjacent, method), repeats)
+        results[f"section0_{method}_batch"] = {"seconds": seconds, "designs": len(ODs)}
+
+#Best pump for a required head by checking every pump in the catalog, the way pumps were picked before the pump index
+def scan_pumps(pumps_dict, pump_head, target, lifetime):
+    cost = np.asarray(pumps_dict["cost"], dtype=float)
+    power = pump_index.pump_power(pump_head, np.asarray(pumps_dict["efficiency"], dtype=float))
+    value = pump_index.pump_costs(cost, power, lifetime)[1] if target == "cost" else power
+    value = np.where(np.asarray(pumps_dict["head"], dtype=float) >= pump_head, value, np.inf)
+    pump = int(np.argmin(value))
+    return pump if np.isfinite(value[pump]) else -1
+
+#Pump selection from the pump index as the pump catalog grows, on the same required heads at the flow in equations.py
+#Each head is looked up one at a time through the index and by scanning the catalog, and all of them at once through the index
+#Building the index is timed once on its own
+def bench_pump_selection(results, repeats, quick):
+    rng = np.random.default_rng(seed)
+    heads = rng.uniform(5, 100, 1000 if quick else 10000)
+    lookups = heads[:100].tolist()
+
+    for n in [10, 100, 1000] if quick else [10, 100, 1000, 10000, 100000]:
+        pumps_dict = synthetic_pumps(n, rng)
+        start = time.perf_counter()
+        index = pump_index.build_pump_index(pumps_dict, main.lifetime)
+        build = time.perf_counter() - start
+
+        for target in ["cost", "power"]:
+            seconds = timeit(lambda: [pump_index.select_pump(index, head, target) for head in lookups], repeats)
+            scan = timeit(lambda: [scan_pumps(pumps_dict, head, target, main.lifetime) for head in lookups], repeats)
+            batch = timeit(lambda: pump_index.select_pump(index, heads, target), repeats)
+            results[f"pump_selection_{target}_{n}"] = {"seconds": seconds, "lookups": len(lookups), "scan_seconds": scan, "batch_seconds": batch, "batch_heads": len(heads), "build_seconds": build, "pumps": n}
+
+#End to end sweep with each engine as the OD resolution and catalog sizes grow
+#The scalar sweep and the search solve the designs the same way, so that their times show what the search saves by pruning
+def bench_sweep(results, repeats, quick):
+    rng = np.random.default_rng(seed)
+    sizes = [(11, 8, 3), (51, 100, 3)] if quick else [(11, 8, 3), (51, 100, 3), (201, 1000, 10), (501, 10000, 10)]
+
+    for n_ODs, n_pumps, n_hx in sizes:
+        ODs = list(np.linspace(1, 6, n_ODs))
+        pumps_dict = synthetic_pumps(n_pumps, rng)
+        heat_exchangers_dict = synthetic_heat_exchangers(n_hx, rng) if n_hx != 3 else heat_exchangers.heat_exchangers_dict
+        index = pump_index.build_pump_index(pumps_dict, main.lifetime)
+        space = sweep.design_space(ODs, main.schedules, main.materials, heat_exchangers_dict)
+        name = f"{n_ODs}x{n_pumps}x{n_hx}"
+
+        def scalar():
+            for designs, optimal in sweep.sweep(space, main.sections, main.min_pressure, main.target, main.lifetime, "substitution", index=index):
+                pass
+
+        engines = {
+            "scalar": scalar,
+            "vectorized": lambda: grid.evaluate_grid(ODs, main.schedules, main.materials, heat_exchangers_dict, main.sections, main.min_pressure, main.target, main.lifetime, index, "secant"),
+            "search": lambda: search.branch_and_bound(ODs, main.schedules, main.materials, heat_exchangers_dict, main.sections, main.min_pressure, main.target, main.lifetime, "substitution", index),
+        }
+        for engine, function in engines.items():
+            results[f"sweep_{engine}_{name}"] = {"seconds": timeit(function, repeats), "designs": len(space)}
+
+#Benchmarks which are slower than the baseline by more than the threshold
+def compare(results, baseline, threshold):
+    regressions = {}
+    for name, result in results.items():
+        if name in baseline and result["seconds"] > baseline[name]["seconds"] * (1 + threshold):
+            regressions[name] = result["seconds"] / baseline[name]["seconds"]
+    return regressions
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Benchmark the solvers, pump selection, and sweep")
+    parser.add_argument("--quick", action="store_true", help="smaller problem sizes")
+    parser.add_argument("--repeats", type=int, default=3, help="number of times each benchmark is run, the best time is kept")
+    parser.add_argument("--output", default=results_file, help="JSON file to write the results to")
+    parser.add_argument("--baseline", default=baseline_file, help="JSON file of results to compare against")
+    parser.add_argument("--threshold", type=float, default=threshold, help="fraction slower than the baseline that counts as a regression")
+    parser.add_argument("--save-baseline", action="store_true", help="save the results as the new baseline")
+    parser.add_argument("--only", nargs="*", default=["equations", "section0", "pump_selection", "sweep"], help="benchmarks to run")
+    args = parser.parse_args()
+
+    benchmarks = {"equations": bench_equations, "section0": bench_section0, "pump_selection": bench_pump_selection, "sweep": bench_sweep}
+    results = {}
+    for name in args.only:
+        benchmarks[name](results, args.repeats, args.quick)
+        print(f"Finished {name} benchmarks")
+
+    report = {"python": platform.python_version(), "numpy": np.__version__, "quick": args.quick, "benchmarks": results}
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        sys.exit(0)
+
+    try:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}, run with --save-baseline to create one")
+        sys.exit(0)
+
+    if baseline.get("quick") != args.quick:
+        print("Baseline was run with different problem sizes, not comparing")
+        sys.exit(0)
+
+    regressions = compare(results, baseline["benchmarks"], args.threshold)
+    for name, ratio in regressions.items():
+        print(f"Regression in {name}: {ratio:.2f}x the baseline time")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions over {args.threshold:.0%} against {args.baseline}")
@@ -0,0 +1,119 @@
+import pickle
+import functools
+from collections import OrderedDict
+
+#Maximum number of results kept for each cached function
+maxsize = 100000
+
+#Caches of every memoized function, by name
+caches = {}
+
+#Bounded cache of results which evicts the least recently used result, counting hits and misses
+class LRUCache:
+
+    def __init__(self, maxsize=maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, self.entries[key]
+        self.misses += 1
+        return False, None
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+#Result of a call which raised an exception, so that the exception is raised again on a hit
+class CachedError:
+
+    def __init__(self, error):
+        self.error = error
+
+#Memoize a function under the given name, calls with unhashable arguments (such as numpy arrays) are not cached
+def memoize(name):
+
+    def decorator(function):
+        cache = caches.setdefault(name, LRUCache())
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            try:
+                hit, value = cache.get(key)
+            except TypeError:
+                return function(*args, **kwargs)
+
+            if not hit:
+                try:
+                    value = function(*args, **kwargs)
+                except ArithmeticError as error:
+                    value = CachedError(error)
+                cache.put(key, value)
+
+            if isinstance(value, CachedError):
+                raise value.error
+            return value
+
+        return wrapper
+
+    return decorator
+
+#Hits, misses and size of every cache
+def stats():
+    return {name: {"hits": cache.hits, "misses": cache.misses, "size": len(cache.entries)} for name, cache in caches.items()}
+
+#Empty every cache
+def clear():
+    for cache in caches.values():
+        cache.clear()
+
+#Copy of the results of every cache, by name
+def entries():
+    return {name: dict(cache.entries) for name, cache in caches.items()}
+
+#Keys of every cache, to find the results added after this with added
+def keys():
+    return {name: set(cache.entries) for name, cache in caches.items()}
+
+#Results added to every cache since keys were taken
+def added(keys):
+    return {name: {key: value for key, value in cache.entries.items() if key not in keys.get(name, ())} for name, cache in caches.items()}
+
+#Put results saved by an earlier run or added in another process into the caches
+def merge(saved):
+    for name, results in saved.items():
+        cache = caches.setdefault(name, LRUCache())
+        for key, value in results.items():
+            cache.put(key, value)
+
+#Save the results of every cache to a file, so that a later run can skip the calculations
+#The key identifies the inputs the results were calculated from, see load
+def save(path, key=None):
+    with open(path, "wb") as file:
+        pickle.dump({"key": key, "entries": entries()}, file)
+
+#Load results saved by an earlier run into the caches, does nothing if the file does not exist
+#Results saved with a different key were calculated from other inputs, so the file is discarded and False is returned
+def load(path, key=None):
+    try:
+        with open(path, "rb") as file:
+            saved = pickle.load(file)
+    except FileNotFoundError:
+        return True
+    if not isinstance(saved, dict) or "entries" not in saved or saved.get("key") != key:
+        return False
+    merge(saved["entries"])
+    return True
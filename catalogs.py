@@ -0,0 +1,118 @@
+import csv
+import numpy as np
+
+#Columns of each kind of catalog and their types, the built in catalogs in pumps.py, pipes.py and heat_exchangers.py use the same columns
+pump_columns = {"ID": str, "RPM": int, "cost": float, "efficiency": float, "head": float}
+pipe_columns = {"schedule": int, "material": str, "wall_slope": float, "wall_intercept": float, "max_pressure": float, "cost_slope": float, "cost_intercept": float, "roughness": float}
+heat_exchanger_columns = {"Design": str, "Cost": float, "k": float}
+
+#Columns of a route, one row for each section with the elevation at its start and end and the horizontal distance it covers
+route_columns = {"z0": float, "z2": float, "adjacent": float}
+
+#Columns of a load profile, one row for each hour with the heat demand in kW
+profile_columns = {"demand": float}
+
+#Load a catalog from a CSV file with a header row, or from a structured .npy file saved by save_catalog
+#The catalog is a dictionary with a numpy array for each column, .npy catalogs are memory mapped rather than read into memory
+def load_catalog(path, columns):
+
+    if path.endswith(".npy"):
+        array = np.load(path, mmap_mode="r")
+        if array.dtype.names is None:
+            raise ValueError(f"{path}: catalog must be a structured array")
+        missing = [name for name in columns if name not in array.dtype.names]
+        if missing:
+            raise ValueError(f"{path}: catalog is missing columns {missing}")
+        catalog = {name: array[name] for name in columns}
+
+    else:
+        with open(path, newline="") as file:
+            reader = csv.DictReader(file)
+            missing = [name for name in columns if name not in (reader.fieldnames or [])]
+            if missing:
+                raise ValueError(f"{path}: catalog is missing columns {missing}")
+            rows = list(reader)
+
+        catalog = {}
+        for name, kind in columns.items():
+            try:
+                values = [kind(field(row, name, line)) for line, row in enumerate(rows, start=2)]
+            except (TypeError, ValueError) as error:
+                raise ValueError(f"{path}: bad value in column {name}: {error}")
+            catalog[name] = np.asarray(values, dtype=str if kind is str else kind)
+
+    validate_catalog(catalog, columns, path)
+    return catalog
+
+#Value of a column in a row of a CSV file, a row with fewer fields than the header has no value for its last columns
+def field(row, name, line):
+    value = row[name]
+    if value is None:
+        raise ValueError(f"no value on line {line}")
+    return value.strip()
+
+#Save a catalog as a structured .npy file which load_catalog can memory map
+def save_catalog(path, catalog, columns):
+    validate_catalog(catalog, columns, path)
+    fields = [(name, np.asarray(catalog[name]).dtype if kind is str else kind) for name, kind in columns.items()]
+    array = np.empty(len(catalog[next(iter(columns))]), dtype=fields)
+    for name in columns:
+        array[name] = catalog[name]
+    np.save(path, array)
+
+#Check that a catalog has every column, that the columns are the same length, and that the values make sense
+def validate_catalog(catalog, columns, path="catalog"):
+
+    lengths = {len(catalog[name]) for name in columns}
+    if len(lengths) > 1:
+        raise ValueError(f"{path}: columns have different lengths")
+
+    for name, kind in columns.items():
+        if kind is not str and not np.all(np.isfinite(np.asarray(catalog[name], dtype=float))):
+            raise ValueError(f"{path}: column {name} has values which are not finite")
+
+    #Ranges of the values in each kind of catalog
+    checks = {
+        "efficiency": lambda values: np.all((values > 0) & (values <= 1)),
+        "head": lambda values: np.all(values > 0),
+        "cost": lambda values: np.all(values >= 0),
+        "Cost": lambda values: np.all(values >= 0),
+        "k": lambda values: np.all(values >= 0),
+        "max_pressure": lambda values: np.all(values > 0),
+        "roughness": lambda values: np.all(values >= 0),
+        "adjacent": lambda values: np.all(values >= 0),
+        "demand": lambda values: np.all(values >= 0),
+    }
+    for name, check in checks.items():
+        if name in columns and not check(np.asarray(catalog[name], dtype=float)):
+            raise ValueError(f"{path}: column {name} has values out of range")
+
+    if "z0" in columns and len(catalog["z0"]) == 0:
+        raise ValueError(f"{path}: route has no sections")
+
+    if "demand" in columns and len(catalog["demand"]) == 0:
+        raise ValueError(f"{path}: profile has no hours")
+
+    if "schedule" in columns:
+        combinations = list(zip(catalog["schedule"], catalog["material"]))
+        if len(set(combinations)) != len(combinations):
+            raise ValueError(f"{path}: schedule and material combinations are not unique")
+
+#Load each kind of catalog
+def load_pumps(path):
+    return load_catalog(path, pump_columns)
+
+def load_pipes(path):
+    return load_catalog(path, pipe_columns)
+
+def load_heat_exchangers(path):
+    return load_catalog(path, heat_exchanger_columns)
+
+#Load a route as a list of (z0, z2, adjacent) sections, in the same form as main.sections
+def load_route(path):
+    route = load_catalog(path, route_columns)
+    return list(zip(*[np.asarray(route[name]).tolist() for name in route_columns]))
+
+#Load a load profile as an array of the heat demand in kW of each hour
+def load_profile(path):
+    return np.asarray(load_catalog(path, profile_columns)["demand"], dtype=float)
@@ -0,0 +1,30 @@
+import pytest
+import main
+import pumps
+import heat_exchangers
+import sweep
+import pump_index
+
+#Fields of an optimal design which every engine has to agree on
+fields = ["OD", "schedule", "material", "heat_exchanger", *sweep.objectives]
+
+#Every design and the optimal designs of the scalar sweep on the inputs in main.py, for each target
+@pytest.fixture(scope="session", params=["power", "cost"])
+def scalar(request):
+    target = request.param
+    index = pump_index.build_pump_index(pumps.pumps_dict, main.lifetime, main.electricity_price, main.discount_rate)
+    space = sweep.design_space(main.ODs, main.schedules, main.materials, heat_exchangers.heat_exchangers_dict)
+    designs, optimal = [], {}
+    for chunk, chunk_optimal in sweep.sweep(space, main.sections, main.min_pressure, target, main.lifetime, "substitution", index=index):
+        designs.extend(chunk)
+        sweep.merge_optimal(optimal, chunk_optimal)
+    return {"target": target, "index": index, "designs": designs, "optimal": optimal}
+
+#Check that two sets of optimal designs are the same designs with the same totals
+def check_optimal(optimal, expected):
+    assert set(optimal) == set(sweep.objectives)
+    for key in sweep.objectives:
+        for field in fields[:4]:
+            assert optimal[key][field] == expected[key][field]
+        for field in fields[4:]:
+            assert optimal[key][field] == pytest.approx(expected[key][field], rel=1e-9)
@@ -0,0 +1,152 @@
+import hashlib
+import pickle
+import numpy as np
+import equations
+import solvers
+import grid
+import sweep
+import pump_index
+import instrument
+
+#Pumps which can be the lowest lifetime cost pump for a required head at any price of electricity, lifetime, or discount rate,
+#for each position in the catalog sorted by head (the pumps with at least the head at that position)
+#A pump is dropped once a pump earlier in the catalog is no more expensive and no less efficient, since the earlier pump
+#then has a lifetime cost no higher for a positive head and wins ties. Negative heads favour the least efficient pumps,
+#so pumps are kept while they are not dominated in either direction. Returns an array padded with -1.
+def pump_candidates(pumps_dict):
+
+    cost = np.asarray(pumps_dict["cost"], dtype=float)
+    efficiency = np.asarray(pumps_dict["efficiency"], dtype=float)
+    order = np.argsort(np.asarray(pumps_dict["head"], dtype=float), kind="stable")
+
+    positive = []
+    negative = []
+    candidates = []
+    for pump in order[::-1].tolist():
+        if not any(other < pump and cost[other] <= cost[pump] and efficiency[other] >= efficiency[pump] for other in positive):
+            positive = [other for other in positive if not (pump < other and cost[pump] <= cost[other] and efficiency[pump] >= efficiency[other])] + [pump]
+        if not any(other < pump and cost[other] <= cost[pump] and efficiency[other] <= efficiency[pump] for other in negative):
+            negative = [other for other in negative if not (pump < other and cost[pump] <= cost[other] and efficiency[pump] <= efficiency[other])] + [pump]
+        candidates.append(sorted(set(positive) | set(negative)))
+
+    candidates.reverse()
+    width = max([len(pumps) for pumps in candidates], default=0)
+    return np.asarray([pumps + [-1] * (width - len(pumps)) for pumps in candidates], dtype=int).reshape(len(candidates), width)
+
+#Hydraulic table of every design in the grid: the length of pipe and minimum required pump head of every section, along with
+#everything needed to pick pumps for them. None of it depends on the price of electricity, lifetime, discount rate, or target.
+@instrument.timed("hydraulic_table")
+def hydraulic_table(ODs, schedules, materials, heat_exchangers_dict, sections, min_pressure, pumps_dict, method="substitution"):
+
+    pipes = grid.grid_pipes(ODs, schedules, materials, heat_exchangers_dict, min_pressure)
+    unique = list(dict.fromkeys(sections))
+    solved = dict(zip(unique, grid.solve_hydraulics(pipes, unique, method)))
+    solved = [solved[section] for section in sections]
+    pump_head = np.stack([section["pump_head"] for section in solved])
+
+    #Pumps for the targets which only depend on the catalog, and the position of every head in the catalog for the lifetime cost
+    index = pump_index.build_pump_index(pumps_dict)
+    table = pump_table(pumps_dict)
+    table.update({
+        "key": table_key(ODs, schedules, materials, heat_exchangers_dict, sections, min_pressure, pumps_dict, method),
+        "pipes": pipes,
+        "length": np.stack([section["length"] for section in solved]),
+        "iterations": np.stack([section["iterations"] for section in solved]),
+        "diverged": np.stack([section["diverged"] for section in solved]),
+        "pump_head": pump_head,
+        "position": np.searchsorted(table["head"], pump_head, side="left"),
+        "capital_pumps": pump_index.select_pump(index, pump_head, "capital"),
+        "power_pumps": pump_index.select_pump(index, pump_head, "power"),
+    })
+    return table
+
+#Pump catalog with its heads sorted, and the candidate pumps at each position of the sorted heads
+def pump_table(pumps_dict):
+    return {
+        "pumps_dict": pumps_dict,
+        "cost": np.asarray(pumps_dict["cost"], dtype=float),
+        "efficiency": np.asarray(pumps_dict["efficiency"], dtype=float),
+        "head": np.sort(np.asarray(pumps_dict["head"], dtype=float)),
+        "candidates": pump_candidates(pumps_dict),
+    }
+
+#Pick the best of the candidate pumps for every required head, returning -1 where no pump has enough head
+#The lifetime, price, rate, and physical properties may be arrays which broadcast against the heads, the first of the best
+#candidates is picked like pump_index.select_pump
+def select_candidates(table, pump_head, position, target, lifetime, price, rate, properties=None):
+
+    available = position < len(table["cost"])
+    candidates = np.moveaxis(table["candidates"][np.where(available, position, 0)], -1, 0)
+    valid = (candidates >= 0) & available
+    pump = np.where(valid, candidates, 0)
+
+    with np.errstate(invalid="ignore"):
+        if target == "capital":
+            value = table["cost"][pump]
+        elif target == "power":
+            value = pump_index.pump_power(pump_head, table["efficiency"][pump], properties)
+        elif target == "cost":
+            value = pump_index.pump_costs(table["cost"][pump], pump_index.pump_power(pump_head, table["efficiency"][pump], properties), lifetime, price, rate)[1]
+        else:
+            raise ValueError(f"Unknown target for pump selection: {target}")
+
+    value = np.where(valid, value, np.inf)
+    selected = np.take_along_axis(pump, np.argmin(value, axis=0)[np.newaxis], axis=0)[0]
+    return np.where(available, selected, -1)
+
+#Hash of everything the hydraulic table is built from, so that a saved table is only used for the same grid
+#This includes the pipe catalog in use and the constants of the solvers and equations, which the lengths and heads depend on
+def table_key(ODs, schedules, materials, heat_exchangers_dict, sections, min_pressure, pumps_dict, method):
+    catalogs = [[np.asarray(catalog[name]).tolist() for name in sorted(catalog)] for catalog in [heat_exchangers_dict, pumps_dict, solvers.pipes_dict]]
+    constants = [np.asarray(value).tolist() for value in [equations.density, equations.gravity, equations.viscosity, equations.flow, solvers.x, solvers.error_threshold, solvers.max_iterations]]
+    key = repr((np.asarray(ODs).tolist(), list(schedules), list(materials), catalogs, constants, [tuple(section) for section in sections], min_pressure, method))
+    return hashlib.sha256(key.encode()).hexdigest()
+
+#Pick the pumps of every section and add up the totals of every design for a price of electricity, lifetime, discount rate, and target
+#The price and discount rate default to those of pump_index. Returns a dictionary of flat arrays in the same form as grid.evaluate_grid,
+#which gives the same results as evaluating the grid again.
+@instrument.timed("rank")
+def rank(table, target, lifetime, price=None, rate=None):
+
+    if price is None: price = pump_index.electricity_price
+    if rate is None: rate = pump_index.discount_rate
+    index = {"pumps_dict": table["pumps_dict"], "cost": table["cost"], "efficiency": table["efficiency"], "price": price, "rate": rate}
+    pump_head = table["pump_head"]
+
+    if target == "capital":
+        selected = table["capital_pumps"]
+    elif target == "power":
+        selected = table["power_pumps"]
+    else:
+        selected = select_candidates(table, pump_head, table["position"], target, lifetime, price, rate)
+
+    selected, capital_cost, operating_cost, total_cost, power = grid.pump_values(selected, pump_head, lifetime, index)
+    solved = [
+        {"length": table["length"][i], "iterations": table["iterations"][i], "diverged": table["diverged"][i], "pump": selected[i],
+         "capital_cost": capital_cost[i], "operating_cost": operating_cost[i], "total_cost": total_cost[i], "power": power[i]}
+        for i in range(len(pump_head))
+    ]
+    return grid.grid_results(table["pipes"], solved, lifetime, index)
+
+#Optimal design for each objective out of ranked results, an earlier design is kept when two are equal like sweep.optimal_designs
+def optimal_designs(results):
+    feasible = results["reason"] == grid.FEASIBLE
+    optimal = {}
+    if feasible.any():
+        for key in sweep.objectives:
+            optimal[key] = grid.grid_design(results, int(np.argmin(np.where(feasible, results[key], np.inf))))
+    return optimal
+
+#Save a hydraulic table to a file
+def save_table(path, table):
+    with open(path, "wb") as file:
+        pickle.dump(table, file)
+
+#Load a hydraulic table saved by an earlier run, or None if the file does not exist or the table is of a different grid
+def load_table(path, key):
+    try:
+        with open(path, "rb") as file:
+            table = pickle.load(file)
+    except FileNotFoundError:
+        return None
+    return table if table["key"] == key else None
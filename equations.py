@@ -1,45 +1,69 @@
 import math
+import cache
+import instrument
+import numpy as np
 
 density = 995.27 #kg/m^3, average for water at 20-40C
 gravity = 9.81 #m/s^2
 viscosity = 0.0008272 #N*s/m^2, average for water at 20-40C
 PI = math.pi
 
-#Calculate Q:
-flow = (15000 * 15 + 12000 * 45 + 5000 * 80) * 4 #In kWh/yr
-flow = flow * 3600 #Convert to kJ/yr
-flow = flow / (365 * 24 * 3600) #Convert to kJ/s
-flow = flow / (4.2 * 20 * density) #Convert to m^3/s
+#Flow of water in m^3/s that carries a heat demand in kJ/s (kW), with a 20C drop in temperature
+def heat_flow(demand):
+    return demand / (4.2 * 20 * density)
+
+#Calculate Q from the average heat demand:
+demand = (15000 * 15 + 12000 * 45 + 5000 * 80) * 4 #In kWh/yr
+demand = demand * 3600 #Convert to kJ/yr
+demand = demand / (365 * 24 * 3600) #Convert to kJ/s
+flow = heat_flow(demand) #Convert to m^3/s
+
+#Each of the equations below takes other values of the physical properties as an optional dictionary with any of density,
+#viscosity, and flow, the values in this module are used for the rest. The values may be arrays, such as sampled values with
+#one per scenario or the flow of each hour, which broadcast against the other arguments. Memoized functions do not cache calls
+#given properties, since a dictionary cannot be hashed.
 
 #Intake a minimum pressure in pascals, find the pressure before and after the heat exchanger in m of head
-def pressures(diameter, k, min_pressure):
-    p0_head = min_pressure / (density * gravity)
-    v = velocity(diameter)
+@cache.memoize("pressures")
+@instrument.timed("pressures")
+def pressures(diameter, k, min_pressure, properties=None):
+    rho = density if properties is None else properties.get("density", density)
+    p0_head = min_pressure / (rho * gravity)
+    v = velocity(diameter, properties)
     p2_head = p0_head + (k * (v ** 2)) / (2 * gravity)
     return p0_head, p2_head
 
 #Calculate loss of head due to friciton
-def hloss(length, diameter, roughness):
-    v = velocity(diameter)
-    f = friction(length, diameter, roughness)
+def hloss(length, diameter, roughness, properties=None):
+    v = velocity(diameter, properties)
+    f = friction(length, diameter, roughness, properties)
     hl = (f * length * (v ** 2)) / (2 * diameter * gravity)
     return hl
 
 #Calculate friction factor
-def friction(length, diameter, roughness):
-    re = reynolds(length, diameter)
-    f = (-1.8 * math.log((((roughness / diameter) / 3.7) ** 1.11 + (6.9 / re)), 10)) ** -2
+def friction(length, diameter, roughness, properties=None):
+    re = reynolds(length, diameter, properties)
+    f = (-1.8 * log10(((roughness / diameter) / 3.7) ** 1.11 + (6.9 / re))) ** -2
     return f
 
 #calculate reynolds number
-def reynolds(length, diameter):
-    v = velocity(diameter)
-    re = (density * (v ** 2) * length) / viscosity
+def reynolds(length, diameter, properties=None):
+    v = velocity(diameter, properties)
+    if properties is None:
+        re = (density * (v ** 2) * length) / viscosity
+    else:
+        re = (properties.get("density", density) * (v ** 2) * length) / properties.get("viscosity", viscosity)
     return re
 
 #Calculate velocity
-def velocity(diameter):
-    v = (4 * flow) / ((diameter ** 2) * PI)
+def velocity(diameter, properties=None):
+    q = flow if properties is None else properties.get("flow", flow)
+    v = (4 * q) / ((diameter ** 2) * PI)
     return v
 
-
+#Base 10 logarithm that accepts either a float or a numpy array
+#Arrays are divided by log(10) the same way as math.log so that both give identical results
+def log10(value):
+    if isinstance(value, np.ndarray):
+        return np.log(value) / math.log(10)
+    return math.log(value, 10)
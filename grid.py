@@ -0,0 +1,222 @@
+import equations
+import solvers
+import pump_index
+import instrument
+import numpy as np
+
+#Codes for why a design in the grid is not feasible, in the order that they are checked
+FEASIBLE = 0
+PRESSURE = 1
+DIVERGED = 2
+PUMP = 3
+reasons = [None, "pressure", "diverged", "pump"]
+
+#Pick the best pump from the pump index for an array of required pump heads, returning -1 as the pump where no pump has enough head
+def select_pumps(pump_head, target, lifetime, index, properties=None):
+    return pump_values(pump_index.select_pump(index, pump_head, target, properties), pump_head, lifetime, index, properties)
+
+#Capital cost, operating cost, lifetime cost, and power of the selected pumps at the price of electricity and discount rate of the index
+#The values are nan where no pump was selected
+def pump_values(selected, pump_head, lifetime, index, properties=None):
+
+    available = selected >= 0
+    pump = np.where(available, selected, 0)
+
+    #Gather the values for the selected pumps
+    with np.errstate(invalid="ignore"):
+        pump_capital_cost = np.where(available, index["cost"][pump], np.nan)
+        pump_power = np.where(available, pump_index.pump_power(pump_head, index["efficiency"][pump], properties), np.nan)
+        pump_operating_cost, pump_total_cost = pump_index.pump_costs(pump_capital_cost, pump_power, lifetime, index["price"], index["rate"])
+
+    return selected, pump_capital_cost, pump_operating_cost, pump_total_cost, pump_power
+
+#Largest number of section and design pairs solved at once, independent sections of a route are solved together in blocks of up to this size
+batch_size = 1 << 20
+
+#Pipe properties and pressures of every combination of pipe and heat exchanger
+#Returns a dictionary of flat arrays, ordered the same way as the nested loops in main.py (OD, schedule, material, heat exchanger)
+#The pressures are found at the physical properties given, if any (see equations.py)
+def grid_pipes(ODs, schedules, materials, heat_exchangers_dict, min_pressure, properties=None):
+
+    OD_values = ODs
+    ODs = np.asarray(ODs, dtype=float)
+    shape = (len(ODs), len(schedules), len(materials), len(heat_exchangers_dict["k"]))
+
+    #Pipe properties are vectorized over OD for each schedule and material
+    diameter = np.empty(shape[:3])
+    roughness = np.empty(shape[:3])
+    pipe_cost = np.empty(shape[:3])
+    max_pressure = np.empty(shape[:3])
+    for j, schedule in enumerate(schedules):
+        for l, material in enumerate(materials):
+            diameter[:, j, l], roughness[:, j, l], pipe_cost[:, j, l], max_pressure[:, j, l] = solvers.pipe_properties(ODs, schedule, material)
+
+    #Broadcast the pipe properties against the heat exchangers and flatten
+    pipes = {
+        "ODs": list(OD_values),
+        "schedules": list(schedules),
+        "materials": list(materials),
+        "heat_exchangers": list(heat_exchangers_dict["Design"]),
+        "diameter": np.broadcast_to(diameter[..., np.newaxis], shape).ravel(),
+        "roughness": np.broadcast_to(roughness[..., np.newaxis], shape).ravel(),
+        "pipe_cost": np.broadcast_to(pipe_cost[..., np.newaxis], shape).ravel(),
+        "max_pressure": np.broadcast_to(max_pressure[..., np.newaxis], shape).ravel(),
+        "k": np.broadcast_to(np.asarray(heat_exchangers_dict["k"], dtype=float), shape).ravel(),
+        "hx_cost": np.broadcast_to(np.asarray(heat_exchangers_dict["Cost"], dtype=float), shape).ravel(),
+    }
+    pipes["OD_index"], pipes["schedule_index"], pipes["material_index"], pipes["hx_index"] = [axis.ravel() for axis in np.indices(shape)]
+
+    #Calculating pressures (in head) before and after heat exchanger
+    pipes["p0"], pipes["p2"] = equations.pressures(pipes["diameter"], pipes["k"], min_pressure, properties)
+
+    return pipes
+
+#Solve the hydraulics of sections for every design in the grid, returning the length of pipe (in total and of each part of the
+#section), minimum required pump head, iterations, and a mask of the designs which diverged as arrays over the designs for each section
+#Sections do not depend on each other, so a block of sections is solved as one batch with a row for each section
+def solve_hydraulics(pipes, sections, method="substitution", properties=None):
+
+    n = len(pipes["diameter"])
+    block = max(1, batch_size // max(n, 1))
+    solved = []
+    for start in range(0, len(sections), block):
+        z0, z2, adjacent = [np.asarray(values, dtype=float)[:, np.newaxis] for values in zip(*sections[start:start + block])]
+        shape = (len(z0), n)
+        diameter = np.broadcast_to(pipes["diameter"], shape)
+        roughness = np.broadcast_to(pipes["roughness"], shape)
+
+        length0, y, diverged, iterations = solvers.solve_section0_batch(diameter, roughness, np.broadcast_to(pipes["p0"], shape), z0, adjacent, method, properties=properties)
+        with np.errstate(invalid="ignore"):
+            length1, pump_head = solvers.solve_section1(diameter, roughness, pipes["p2"], y, z2, False, properties)
+
+        for i in range(len(z0)):
+            solved.append({"length": length0[i] + length1[i], "length0": length0[i], "length1": length1[i], "pump_head": pump_head[i], "iterations": iterations[i], "diverged": diverged[i]})
+
+    return solved
+
+#Pick the best pump for every section and design, adding the pump and its costs and power to each solved section
+def price_sections(solved, target, lifetime, index, properties=None):
+
+    if not solved:
+        return solved
+    selected, capital_cost, operating_cost, total_cost, power = select_pumps(np.stack([section["pump_head"] for section in solved]), target, lifetime, index, properties)
+    for i, section in enumerate(solved):
+        section.update({"pump": selected[i], "capital_cost": capital_cost[i], "operating_cost": operating_cost[i], "total_cost": total_cost[i], "power": power[i]})
+
+    return solved
+
+#Solve sections for every design in the grid, returning a dictionary of arrays over the designs for each section
+#Sections are solved and their pumps picked at the physical properties given, if any
+def solve_sections(pipes, sections, target, lifetime, index, method="substitution", properties=None):
+    return price_sections(solve_hydraulics(pipes, sections, method, properties), target, lifetime, index, properties)
+
+#Combine the solved sections of a route into the results of every design
+#Returns a dictionary of flat arrays, in the same form as evaluate_grid
+def grid_results(pipes, solved, lifetime, index):
+
+    #Reason that each design is not feasible, in the same order of precedence as the sweep
+    reason = np.full(pipes["diameter"].shape, FEASIBLE)
+    reason[np.any(np.stack([section["pump"] for section in solved]) < 0, axis=0)] = PUMP
+    reason[np.any(np.stack([section["diverged"] for section in solved]), axis=0)] = DIVERGED
+    reason[pipes["p2"] > pipes["max_pressure"]] = PRESSURE
+
+    #Find total capital cost, operating cost, and power
+    total_length = sum(section["length"] for section in solved)
+    total_pipe_cost = pipes["pipe_cost"] * total_length
+    total_capital_cost = total_pipe_cost + sum(section["capital_cost"] for section in solved) + pipes["hx_cost"]
+    total_operating_cost = sum(section["operating_cost"] for section in solved)
+    total_lifetime_cost = sum(section["total_cost"] for section in solved) + total_pipe_cost + pipes["hx_cost"]
+    total_power = sum(section["power"] for section in solved)
+
+    return {
+        "ODs": pipes["ODs"],
+        "schedules": pipes["schedules"],
+        "materials": pipes["materials"],
+        "heat_exchangers": pipes["heat_exchangers"],
+        "OD_index": pipes["OD_index"],
+        "schedule_index": pipes["schedule_index"],
+        "material_index": pipes["material_index"],
+        "hx_index": pipes["hx_index"],
+        "lifetime": lifetime,
+        "pumps_dict": index["pumps_dict"],
+        "reason": reason,
+        "excess_pressure": pipes["p2"] - pipes["max_pressure"],
+        "lengths": np.stack([section["length"] for section in solved], axis=-1),
+        "iterations": np.stack([section["iterations"] for section in solved], axis=-1),
+        "pumps": np.stack([section["pump"] for section in solved], axis=-1),
+        "total_length": total_length,
+        "total_capital_cost": total_capital_cost,
+        "total_operating_cost": total_operating_cost,
+        "total_lifetime_cost": total_lifetime_cost,
+        "total_power": total_power,
+    }
+
+#Evaluate every combination of pipe and heat exchanger at once
+#Returns a dictionary of flat arrays, ordered the same way as the nested loops in main.py (OD, schedule, material, heat exchanger)
+#Sections with the same elevations and horizontal distance are only solved once
+@instrument.timed("evaluate_grid")
+def evaluate_grid(ODs, schedules, materials, heat_exchangers_dict, sections, min_pressure, target, lifetime, index=None, method="substitution"):
+
+    if index is None: index = pump_index.default_index(lifetime)
+    pipes = grid_pipes(ODs, schedules, materials, heat_exchangers_dict, min_pressure)
+    unique = list(dict.fromkeys(sections))
+    solved = dict(zip(unique, solve_sections(pipes, unique, target, lifetime, index, method)))
+    return grid_results(pipes, [solved[section] for section in sections], lifetime, index)
+
+#Evaluate the grid for a route which changes over time, such as while a route is being edited
+#The solved sections of the current route are kept, so that only sections with new elevations or horizontal distances
+#are solved when the route changes and the totals are recombined from the kept sections
+class IncrementalGrid:
+
+    def __init__(self, ODs, schedules, materials, heat_exchangers_dict, min_pressure, target, lifetime, index=None, method="substitution"):
+        self.target = target
+        self.lifetime = lifetime
+        self.index = index if index is not None else pump_index.default_index(lifetime)
+        self.method = method
+        self.pipes = grid_pipes(ODs, schedules, materials, heat_exchangers_dict, min_pressure)
+        self.sections = []
+        self.solved = {}
+
+    #Evaluate the grid for a route, solving only the sections which were not in the last route
+    def evaluate(self, sections):
+        sections = [tuple(section) for section in sections]
+        new = [section for section in dict.fromkeys(sections) if section not in self.solved]
+        self.solved.update(zip(new, solve_sections(self.pipes, new, self.target, self.lifetime, self.index, self.method)))
+        instrument.count("sections_solved", len(new))
+        instrument.count("sections_reused", len(sections) - len(new))
+
+        #Only keep the sections of this route
+        self.sections = sections
+        self.solved = {section: self.solved[section] for section in sections}
+        return grid_results(self.pipes, [self.solved[section] for section in sections], self.lifetime, self.index)
+
+    #Change the elevations and horizontal distance of one section of the route, and evaluate the grid again
+    def update(self, position, section):
+        sections = list(self.sections)
+        sections[position] = section
+        return self.evaluate(sections)
+
+#Build the same dictionary as solvers.solve_design for a single design in the grid
+def grid_design(grid, index):
+
+    design = {
+        "OD": grid["ODs"][grid["OD_index"][index]],
+        "schedule": grid["schedules"][grid["schedule_index"][index]],
+        "material": grid["materials"][grid["material_index"][index]],
+        "heat_exchanger": grid["heat_exchangers"][grid["hx_index"][index]],
+        "lifetime": grid["lifetime"],
+        "reason": reasons[grid["reason"][index]],
+    }
+
+    if design["reason"] == "pressure":
+        design["excess_pressure"] = grid["excess_pressure"][index]
+
+    elif design["reason"] is None:
+        design["total_length"] = grid["total_length"][index]
+        design["total_capital_cost"] = grid["total_capital_cost"][index]
+        design["total_operating_cost"] = grid["total_operating_cost"][index]
+        design["total_lifetime_cost"] = grid["total_lifetime_cost"][index]
+        design["total_power"] = grid["total_power"][index]
+        design["sections"] = [(length, grid["pumps_dict"]["ID"][pump], grid["pumps_dict"]["RPM"][pump]) for length, pump in zip(grid["lengths"][index], grid["pumps"][index])]
+
+    return design
@@ -0,0 +1,139 @@
+import csv
+from collections import Counter
+import numpy as np
+import equations
+import solvers
+import pump_index
+import grid
+import instrument
+
+#Hours in a year, a profile of several years has this many hours for each year
+hours_per_year = 24 * 365
+
+#Shape of the synthetic profile, the share that the heat demand swings by over the year (highest on the coldest day) and over
+#each day (highest at the peak hour)
+seasonal_swing = 0.6
+daily_swing = 0.3
+coldest_day = 15
+peak_hour = 18
+
+#Hourly heat demand in kW with the same average as the constant demand in equations.py, for when no measured profile is given
+def synthetic_profile(years=1, demand=None):
+    if demand is None: demand = equations.demand
+    hours = np.arange(years * hours_per_year)
+    seasonal = 1 + seasonal_swing * np.cos(2 * np.pi * (hours // 24 - coldest_day) / 365)
+    daily = 1 + daily_swing * np.cos(2 * np.pi * (hours % 24 - peak_hour) / 24)
+    profile = seasonal * daily
+    return profile * (demand / profile.mean())
+
+#Run every design in the grid through an hourly profile of the heat demand in kW
+#The route and pumps of every design are sized at one flow, the constant flow of equations.py or the flow of the peak hour, then the
+#head loss of every section and the pump head it needs are found again at the flow of each hour with the route as built. Hours where
+#a pump does not have enough head, or where the pressure after the heat exchanger is over the rating of the pipe, are counted and a
+#design which falls short in more than allowed_hours hours is not feasible. The operating cost, lifetime cost, and power of every
+#design are from its average power over the profile rather than its power at the constant flow.
+#Hours are solved in chunks as arrays of designs by hours. Returns a dictionary of flat arrays in the same form as grid.evaluate_grid,
+#along with the hours each design falls short, the energy it uses over the profile in kWh, and its peak power.
+@instrument.timed("simulate_hourly")
+def simulate(ODs, schedules, materials, heat_exchangers_dict, sections, min_pressure, target, lifetime, profile, index=None, method="substitution", sizing="constant", allowed_hours=0, chunk_size=None):
+
+    if index is None: index = pump_index.default_index(lifetime)
+    flow = equations.heat_flow(np.asarray(profile, dtype=float))
+    if sizing == "constant":
+        design_flow = equations.flow
+    elif sizing == "peak":
+        design_flow = float(flow.max())
+    else:
+        raise ValueError(f"Unknown sizing for the hourly simulation: {sizing}")
+
+    #Size every section at the design flow, keeping the head loss and slant of each part of the section at that flow
+    unique = list(dict.fromkeys(sections))
+    repeats = Counter(sections)
+    head = np.asarray(index["pumps_dict"]["head"], dtype=float)
+    design = {"flow": design_flow}
+    with np.errstate(invalid="ignore"):
+        pipes = grid.grid_pipes(ODs, schedules, materials, heat_exchangers_dict, min_pressure, design)
+        solved = dict(zip(unique, grid.solve_sections(pipes, unique, target, lifetime, index, method, design)))
+        sized = {}
+        for section in unique:
+            pump = np.maximum(solved[section]["pump"], 0)
+            available = solved[section]["pump"] >= 0
+            sized[section] = {
+                "slant": section_slant(section[0], solved[section]["length0"], pipes["diameter"], pipes["roughness"], pipes["p0"], design),
+                "hloss": equations.hloss(solved[section]["length1"], pipes["diameter"], pipes["roughness"], design),
+                "head": np.where(available, head[pump], np.nan),
+                "efficiency": np.where(available, index["efficiency"][pump], np.nan),
+            }
+
+    n = len(pipes["diameter"])
+    hours = len(flow)
+    if chunk_size is None: chunk_size = max(1, grid.batch_size // max(n * len(unique), 1))
+    energy = {section: np.zeros(n) for section in unique}
+    unmet_hours = np.zeros(n, dtype=int)
+    pressure_hours = np.zeros(n, dtype=int)
+    peak_power = np.full(n, -np.inf)
+    peak_pressure = np.full(n, -np.inf)
+
+    #Head loss and pump head of every section at the flow of each hour, with designs along the first axis and hours along the last
+    column = {name: np.asarray(pipes[name])[..., np.newaxis] for name in ["diameter", "roughness", "k", "p0", "p2", "max_pressure"]}
+    for start in range(0, hours, chunk_size):
+        hourly = {"flow": flow[start:start + chunk_size]}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            p2 = equations.pressures(column["diameter"], column["k"], min_pressure, hourly)[1]
+            short = np.zeros(p2.shape, dtype=bool)
+            power = np.zeros(p2.shape)
+            for section in unique:
+                hloss = equations.hloss(solved[section]["length1"][:, np.newaxis], column["diameter"], column["roughness"], hourly)
+                slant = section_slant(section[0], solved[section]["length0"][:, np.newaxis], column["diameter"], column["roughness"], column["p0"], hourly)
+                pump_head = solved[section]["pump_head"][:, np.newaxis] + (p2 - column["p2"]) + (hloss - sized[section]["hloss"][:, np.newaxis]) + (slant - sized[section]["slant"][:, np.newaxis])
+                section_power = pump_index.pump_power(pump_head, sized[section]["efficiency"][:, np.newaxis], hourly)
+                short |= pump_head > sized[section]["head"][:, np.newaxis]
+                energy[section] += section_power.sum(axis=1)
+                power += section_power * repeats[section]
+
+            unmet_hours += short.sum(axis=1)
+            pressure_hours += (p2 > column["max_pressure"]).sum(axis=1)
+            peak_power = np.maximum(peak_power, power.max(axis=1))
+            peak_pressure = np.maximum(peak_pressure, p2.max(axis=1))
+    instrument.count("design_hours", n * hours)
+
+    #Cost each section from its average power over the profile
+    for section in unique:
+        average = energy[section] / hours
+        operating_cost, total_cost = pump_index.pump_costs(solved[section]["capital_cost"], average, lifetime, index["price"], index["rate"])
+        solved[section] = dict(solved[section], operating_cost=operating_cost, total_cost=total_cost, power=average)
+    results = grid.grid_results(pipes, [solved[section] for section in sections], lifetime, index)
+
+    #Designs which are feasible at the design flow but fall short in too many hours, in the same order of precedence as the sweep
+    feasible = results["reason"] == grid.FEASIBLE
+    over = feasible & (pressure_hours > allowed_hours)
+    results["reason"][feasible & (unmet_hours > allowed_hours)] = grid.PUMP
+    results["reason"][over] = grid.PRESSURE
+    results["excess_pressure"] = np.where(over, peak_pressure - pipes["max_pressure"], results["excess_pressure"])
+
+    results.update({
+        "hours": hours,
+        "unmet_hours": unmet_hours,
+        "pressure_hours": pressure_hours,
+        "energy": sum(energy[section] for section in sections),
+        "peak_power": peak_power,
+    })
+    return results
+
+#Slant that section 0 needs for the head loss along its length as built (equation 1), restricted to > 0 like solvers.solve_section0
+def section_slant(z0, length0, diameter, roughness, p0, properties=None):
+    hloss = equations.hloss(length0, diameter, roughness, properties)
+    return np.maximum(62 - z0 - solvers.x - p0 + hloss, 0)
+
+#Write the hours each design falls short, its energy use in kWh per year, and its average and peak power in kW to a CSV file
+def write_report(path, results):
+
+    years = results["hours"] / hours_per_year
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["OD", "schedule", "material", "heat_exchanger", "reason", "unmet_hours", "pressure_hours", "annual_energy", "average_power", "peak_power"])
+        for position in range(len(results["reason"])):
+            design = grid.grid_design(results, position)
+            values = [results["energy"][position] / years, results["total_power"][position], results["peak_power"][position]]
+            values = [value.item() if np.isfinite(value) else None for value in values]
+            writer.writerow([design["OD"], design["schedule"], design["material"], design["heat_exchanger"], design["reason"], results["unmet_hours"][position].item(), results["pressure_hours"][position].item(), *values])
@@ -0,0 +1,151 @@
+import cProfile
+import contextlib
+import functools
+import json
+import time
+import numpy as np
+import cache
+
+#Whether timers, counters, and values are recorded, switched at runtime with enable and disable
+#While disabled every timed function costs one extra call and a check of this flag
+enabled = False
+
+#Calls and total seconds of each timed stage, the total of each counter, and the count, total, min and max of each recorded value
+#Timed stages which call each other are nested, so the time of a stage includes the time of the stages it calls
+timers = {}
+counters = {}
+values = {}
+
+#Time that recording was last enabled, and the profiler of the current run
+started = None
+profiler = None
+
+#Start recording
+def enable():
+    global enabled, started
+    enabled = True
+    if started is None: started = time.perf_counter()
+
+#Stop recording, keeping what has been recorded so far
+def disable():
+    global enabled
+    enabled = False
+
+#Forget everything recorded so far
+def reset():
+    global started
+    timers.clear()
+    counters.clear()
+    values.clear()
+    started = time.perf_counter() if enabled else None
+
+#Add time to a stage
+def add_time(name, seconds, calls=1):
+    timer = timers.get(name)
+    if timer is None:
+        timer = timers[name] = [0, 0.0]
+    timer[0] += calls
+    timer[1] += seconds
+
+#Time every call of a function as a stage
+def timed(name):
+
+    def decorator(function):
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                add_time(name, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+#Time a block of code as a stage
+@contextlib.contextmanager
+def stage(name):
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_time(name, time.perf_counter() - start)
+
+#Add to a counter
+def count(name, n=1):
+    if enabled:
+        counters[name] = counters.get(name, 0) + n
+
+#Record a value, or an array of values, of a quantity such as the number of iterations a design needed
+def record(name, value):
+    if not enabled:
+        return
+    value = np.asarray(value, dtype=float)
+    if value.size == 0:
+        return
+    n, total, low, high = value.size, float(value.sum()), float(value.min()), float(value.max())
+    current = values.get(name)
+    if current is not None:
+        n, total, low, high = current[0] + n, current[1] + total, min(current[2], low), max(current[3], high)
+    values[name] = [n, total, low, high]
+
+#Everything recorded so far, in a form which can be merged into another process with merge
+def snapshot():
+    return {"timers": {name: list(timer) for name, timer in timers.items()}, "counters": dict(counters), "values": {name: list(value) for name, value in values.items()}}
+
+#Merge a snapshot taken in another process, such as a worker of the sweep
+def merge(other):
+    for name, (calls, seconds) in other["timers"].items():
+        add_time(name, seconds, calls)
+    for name, n in other["counters"].items():
+        counters[name] = counters.get(name, 0) + n
+    for name, (n, total, low, high) in other["values"].items():
+        current = values.get(name)
+        if current is not None:
+            n, total, low, high = current[0] + n, current[1] + total, min(current[2], low), max(current[3], high)
+        values[name] = [n, total, low, high]
+
+#Call a function with recording enabled and return its result along with what was recorded, for use in worker processes
+def collect(function, *args, **kwargs):
+    reset()
+    enable()
+    try:
+        result = function(*args, **kwargs)
+    finally:
+        disable()
+    return result, snapshot()
+
+#Summary of everything recorded, with the stages ordered by their total time
+def summary():
+    return {
+        "elapsed": time.perf_counter() - started if started is not None else 0,
+        "timers": {name: {"calls": calls, "seconds": seconds, "mean": seconds / calls} for name, (calls, seconds) in sorted(timers.items(), key=lambda item: -item[1][1])},
+        "counters": dict(sorted(counters.items())),
+        "values": {name: {"count": n, "total": total, "mean": total / n, "min": low, "max": high} for name, (n, total, low, high) in sorted(values.items())},
+        "caches": cache.stats(),
+    }
+
+#Write the summary to a JSON file
+def save(path):
+    with open(path, "w") as file:
+        json.dump(summary(), file, indent=2)
+
+#Profile every function call with cProfile until stop_profile
+def start_profile():
+    global profiler
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+#Stop profiling and dump the statistics to a file, which can be read with pstats or snakeviz
+def stop_profile(path):
+    global profiler
+    profiler.disable()
+    profiler.dump_stats(path)
+    profiler = None
@@ -1,192 +1,227 @@
-import equations
 import solvers
 import pumps
 import heat_exchangers
-import pandas as pd
+import grid
+import sweep
+import cache
+import sinks
+import pareto
+import search
+import catalogs
+import pump_index
+import instrument
+import economics
+import sensitivity
+import hourly
 
 min_pressure = 101.3 * 1000 #Minimum pressure of system in Pa
 lifetime = 50 #Lifetime of project in years
+electricity_price = 0.16 #Price of electricity used for the operating cost of pumps
+discount_rate = 0 #Discount rate of future operating costs, 0 for no discounting
 
 #Optimize pumps for cost or power
 target = "power" 
 #target = "cost"
 
+#Solve one design at a time, every design at once with numpy arrays, or only the designs which branch and bound cannot prune
+#The table engine keeps the hydraulics of every design in table_file, so that a run with a new target, lifetime, price of
+#electricity, or discount rate only picks the pumps and adds up the costs again
+#The hourly engine runs every design through the hourly heat demand of demand_file, costing it from its average power over the profile
+engine = "scalar"
+#engine = "vectorized"
+#engine = "search"
+#engine = "table"
+#engine = "hourly"
+
+#Solve the slant of each section by successive substitution, or with the accelerated secant method
+solver = "substitution"
+#solver = "secant"
+
+#Number of processes used to solve designs with the scalar engine
+workers = 1
+
+#File to keep the hydraulic results in between runs, so that runs with new economic parameters skip the hydraulics
+cache_file = None
+#cache_file = "hydraulics.cache"
+
+#File to keep the hydraulic table of the table engine in between runs
+table_file = None
+#table_file = "hydraulics.table"
+
+#CSV or .npy files to load the pump, pipe, and heat exchanger catalogs from, the built in catalogs are used when None
+pumps_file = None
+pipes_file = None
+heat_exchangers_file = None
+
+#Combinations of pipe to be tested
+ODs = [1, 1.5, 2, 2.5, 3, 3.5, 4, 4.5, 5, 5.5, 6]
+schedules = [40, 80]
+materials = ["Steel", "PVC"]
+
+#Elevation at the start and end of each section, and the horizontal distance it covers
+sections = [(72, 63, 800), (63, 93, 400), (93, 75, 800), (75, 72, 500)]
+
+#CSV or .npy file to load the sections of the route from instead, with columns z0, z2, and adjacent
+route_file = None
+#route_file = "route.csv"
+
+#CSV or .npy file to load the hourly heat demand in kW from for the hourly engine, with a column demand and a row for each hour
+#of one or more years, a synthetic profile with the same average demand as the constant flow is used when None
+demand_file = None
+#demand_file = "demand.csv"
+
+#Size the route and pumps of the hourly engine for the constant flow or the flow of the peak hour, designs which fall short in
+#more than allowed_hours hours are not feasible, and the hours each design falls short and its energy use are written to hourly_file
+sizing = "constant"
+#sizing = "peak"
+allowed_hours = 0
+hourly_file = "hourly_results.csv"
+
+#Formats that every design is written out in, and the file for each
+outputs = [("text", "results.txt")]
+#outputs = [("text", "results.txt"), ("csv", "results.csv"), ("jsonl", "results.jsonl"), ("npy", "results.npy")]
+
+#File to write the pareto front of capital cost, operating cost, lifetime cost, and power to
+pareto_file = None
+#pareto_file = "pareto_results.txt"
+
+#Number of scenarios of the uncertain inputs in sensitivity.inputs to evaluate every design in, and the file to write how often
+#each design is optimal and the distribution of its lifetime cost to, no sensitivity analysis is run when 0
+scenarios = 0
+#scenarios = 20000
+sensitivity_file = "sensitivity_results.csv"
+
+#File to write the time spent in each stage of the run and the counts of iterations and infeasible designs to, nothing is recorded when None
+instrument_file = None
+#instrument_file = "instrument.json"
+
+#File to dump cProfile statistics of the run to
+profile_file = None
+#profile_file = "main.prof"
+
+#Write an optimal design to the optimal results file
+def write_optimal(file, heading, design):
+
+    file.write("----------------------------------------------------------------------------------------------\n")
+    file.write(f"{heading}\n")
+    file.write(f"OD of {design['OD']} inch schedule {design['schedule']} {design['material']} pipe with {design['heat_exchanger']} heat exchanger\n")
+    file.write(f"Total length of pipe: {design['total_length']}m\n")
+    file.write(f"Total capital cost: ${design['total_capital_cost']}\n")
+    file.write(f"Total operating cost: ${design['total_operating_cost']}/hr\n")
+    file.write(f"Total lifetime cost over {design['lifetime']} years: ${design['total_lifetime_cost']}\n")
+    file.write(f"Total power consumption: {design['total_power']}kW\n")
+    for i, (length, pump_id, rpm) in enumerate(design["sections"]):
+        file.write(f"Section {i + 1} uses {length}m of pipe with the {pump_id} {rpm}RPM pump\n")
+
 if __name__ == '__main__':
 
-    #Get heat exchangers in df
-    heat_exchangers_dataframe = pd.DataFrame.from_dict(heat_exchangers.heat_exchangers_dict)
-
-    #Scope lists of optimal designs
-    minimum_capital_cost_design = None
-    minimum_operating_cost_design = None
-    minimum_lifetime_cost_design = None
-    minimum_power_design = None
-
-    #Open output file
-    with open("results.txt", "w") as file:
-        #For every possible combination of pipe and heat exchanger
-        for OD in [1, 1.5, 2, 2.5, 3, 3.5, 4, 4.5, 5, 5.5, 6]:
-            for schedule in [40, 80]:
-                for material in ["Steel", "PVC"]:
-                    for hx in heat_exchangers_dataframe.iterrows():
-
-                        file.write("----------------------------------------------------------------------------------------------\n")
-
-                        #Turn false only if there are errors with the optimization
-                        successful = True
-
-                        #Based on pipe properties, find the max pressure, wall thickness, cost/m, and roughness
-                        diameter, roughness, pipe_cost, max_pressure = solvers.pipe_properties(OD, schedule, material)
-                        #print(diameter, roughness, pipe_cost, maximum_pressure)
-
-                        #Get k of hx
-                        k = hx[1][2]
-
-                        #Calculating pressures (in head) before and after heat exchanger
-                        p0, p2 = equations.pressures(diameter, k, min_pressure)
-                        #Check if p2 is over max pressure
-                        if p2 > max_pressure:
-                            #Write to file that design is not feasible
-                            file.write(f"Using OD of {OD} inch schedule {schedule} {material} pipe with {hx[1][0]} heat exchanger\n")
-                            file.write(f"Design unsuccessful. Maximum pressure of system exceeds maximum pressure of pipe by {p2 - max_pressure}m of head")
-                            file.write("\n\n\n")
-                            successful = False
-
-                        #Solve each section, returning an error if the design is not feasible
-                        if successful:
-                            try: 
-                                length0, pump_capital_cost0, pump_operating_cost0, pump_total_cost0, pump_power0, selected_pump0 = solvers.solve_section(diameter, roughness, k, p0, p2, 72, 63, 800, target, lifetime, False)
-                                length1, pump_capital_cost1, pump_operating_cost1, pump_total_cost1, pump_power1, selected_pump1 = solvers.solve_section(diameter, roughness, k, p0, p2, 63, 93, 400, target, lifetime, False)
-                                length2, pump_capital_cost2, pump_operating_cost2, pump_total_cost2, pump_power2, selected_pump2 = solvers.solve_section(diameter, roughness, k, p0, p2, 93, 75, 800, target, lifetime, False)
-                                length3, pump_capital_cost3, pump_operating_cost3, pump_total_cost3, pump_power3, selected_pump3 = solvers.solve_section(diameter, roughness, k, p0, p2, 75, 72, 500, target, lifetime, False)
-                            except OverflowError:
-                                #Write to file that the head loss cannot be compensated for by slant
-                                file.write(f"Using OD of {OD} inch schedule {schedule} {material} pipe with {hx[1][0]} heat exchanger\n")
-                                file.write(f"Design unsuccessful. Numerical analysis of slant required to overcome head loss due to friction diverges")
-                                file.write("\n\n\n")
-                                successful = False
-                                break
-
-                        if successful:
-                            try:
-                                #Find total capital cost, operating cost, and power
-                                total_length = length0 + length1 + length2 + length3
-                                total_pipe_cost = pipe_cost * total_length
-                                total_pump_capital_cost = pump_capital_cost0 + pump_capital_cost1 + pump_capital_cost2 + pump_capital_cost3
-                                total_capital_cost = total_pipe_cost + total_pump_capital_cost + hx[1][1]
-
-                                total_operating_cost = pump_operating_cost0 + pump_operating_cost1 + pump_operating_cost2 + pump_operating_cost3
-
-                                total_pump_lifetime_cost = pump_total_cost0 + pump_total_cost1 + pump_total_cost2 + pump_total_cost3
-                                total_lifetime_cost = total_pump_lifetime_cost + total_pipe_cost + hx[1][1]
-
-                                total_power = pump_power0 + pump_power1 + pump_power2 + pump_power3
-
-                            except TypeError:
-                                #Write to file that design is not feasible
-                                file.write(f"Using OD of {OD} inch schedule {schedule} {material} pipe with {hx[1][0]} heat exchanger\n")
-                                file.write(f"Design unsuccessful. Head required by pump exceeds that of pumps available at the given flow rate")
-                                file.write("\n\n\n")
-                                successful = False
-
-                        if successful:
-
-                            #Output to file
-                            file.write(f"Using OD of {OD} inch schedule {schedule} {material} pipe with {hx[1][0]} heat exchanger\n")
-                            file.write(f"Total length of pipe: {total_length}m\n")
-                            file.write(f"Total capital cost: ${total_capital_cost}\n")
-                            file.write(f"Total operating cost: ${total_operating_cost}/hr\n")
-                            file.write(f"Total lifetime cost over {lifetime} years: ${total_lifetime_cost}\n")
-                            file.write(f"Total power consumption: {total_power}kW\n")
-                            file.write(f"Section 1 uses {length0}m of pipe with the {selected_pump0[0]} {selected_pump0[1]}RPM pump\n")
-                            file.write(f"Section 2 uses {length1}m of pipe with the {selected_pump1[0]} {selected_pump1[1]}RPM pump\n")
-                            file.write(f"Section 3 uses {length2}m of pipe with the {selected_pump2[0]} {selected_pump2[1]}RPM pump\n")
-                            file.write(f"Section 4 uses {length3}m of pipe with the {selected_pump3[0]} {selected_pump3[1]}RPM pump\n")
-
-                            file.write("\n\n\n")
-
-                            #Check if this design is optimal and if so, save it
-                            if minimum_capital_cost_design is None or total_capital_cost < minimum_capital_cost_design[5]:
-                                minimum_capital_cost_design = [OD, schedule, material, hx[1][0], total_length, total_capital_cost, total_operating_cost, lifetime, total_lifetime_cost, total_power, 
-                                                            length0, selected_pump0[0], selected_pump0[1],
-                                                            length1, selected_pump1[0], selected_pump1[1],
-                                                            length2, selected_pump2[0], selected_pump2[1],
-                                                            length3, selected_pump3[0], selected_pump3[1]]
-
-                            if minimum_operating_cost_design is None or total_operating_cost < minimum_operating_cost_design[6]:
-                                minimum_operating_cost_design = [OD, schedule, material, hx[1][0], total_length, total_capital_cost, total_operating_cost, lifetime, total_lifetime_cost, total_power, 
-                                                            length0, selected_pump0[0], selected_pump0[1],
-                                                            length1, selected_pump1[0], selected_pump1[1],
-                                                            length2, selected_pump2[0], selected_pump2[1],
-                                                            length3, selected_pump3[0], selected_pump3[1]]
-
-                            if minimum_lifetime_cost_design is None or total_lifetime_cost < minimum_lifetime_cost_design[8]:
-                                minimum_lifetime_cost_design = [OD, schedule, material, hx[1][0], total_length, total_capital_cost, total_operating_cost, lifetime, total_lifetime_cost, total_power, 
-                                                            length0, selected_pump0[0], selected_pump0[1],
-                                                            length1, selected_pump1[0], selected_pump1[1],
-                                                            length2, selected_pump2[0], selected_pump2[1],
-                                                            length3, selected_pump3[0], selected_pump3[1]]
-
-                            if minimum_power_design is None or total_power < minimum_power_design[9]:
-                                minimum_power_design = [OD, schedule, material, hx[1][0], total_length, total_capital_cost, total_operating_cost, lifetime, total_lifetime_cost, total_power, 
-                                                            length0, selected_pump0[0], selected_pump0[1],
-                                                            length1, selected_pump1[0], selected_pump1[1],
-                                                            length2, selected_pump2[0], selected_pump2[1],
-                                                            length3, selected_pump3[0], selected_pump3[1]]
+    #Record the time spent in each stage, and profile the run
+    if instrument_file is not None: instrument.enable()
+    if profile_file is not None: instrument.start_profile()
+
+    #Load the catalogs, and index the pumps
+    with instrument.stage("load_catalogs"):
+        pumps_dict = catalogs.load_pumps(pumps_file) if pumps_file is not None else pumps.pumps_dict
+        heat_exchangers_dict = catalogs.load_heat_exchangers(heat_exchangers_file) if heat_exchangers_file is not None else heat_exchangers.heat_exchangers_dict
+        if pipes_file is not None: solvers.set_pipe_catalog(catalogs.load_pipes(pipes_file))
+        if route_file is not None: sections = catalogs.load_route(route_file)
+        if engine == "hourly": profile = catalogs.load_profile(demand_file) if demand_file is not None else hourly.synthetic_profile()
+    index = pump_index.build_pump_index(pumps_dict, lifetime, electricity_price, discount_rate)
+
+    #Load the hydraulic results of earlier runs, unless they were calculated with another pipe catalog or other constants
+    with instrument.stage("load_cache"):
+        if cache_file is not None and not cache.load(cache_file, solvers.hydraulics_key()):
+            print(f"Ignoring {cache_file}, it was saved with a different pipe catalog or constants")
+
+    #Every possible combination of pipe and heat exchanger
+    space = sweep.design_space(ODs, schedules, materials, heat_exchangers_dict)
+
+    #Evaluate every design up front when using the vectorized engine, otherwise solve the designs in chunks
+    if engine == "vectorized":
+        designs = grid.evaluate_grid(ODs, schedules, materials, heat_exchangers_dict, sections, min_pressure, target, lifetime, index, solver)
+        designs = [grid.grid_design(designs, position) for position in range(len(space))]
+        chunks = [(designs, sweep.optimal_designs(designs))]
+    elif engine == "table":
+        key = economics.table_key(ODs, schedules, materials, heat_exchangers_dict, sections, min_pressure, pumps_dict, solver)
+        table = economics.load_table(table_file, key) if table_file is not None else None
+        if table is None:
+            table = economics.hydraulic_table(ODs, schedules, materials, heat_exchangers_dict, sections, min_pressure, pumps_dict, solver)
+            if table_file is not None: economics.save_table(table_file, table)
+        designs = economics.rank(table, target, lifetime, electricity_price, discount_rate)
+        chunks = [([grid.grid_design(designs, position) for position in range(len(space))], economics.optimal_designs(designs))]
+    elif engine == "hourly":
+        designs = hourly.simulate(ODs, schedules, materials, heat_exchangers_dict, sections, min_pressure, target, lifetime, profile, index, solver, sizing, allowed_hours)
+        with instrument.stage("write_hourly"):
+            hourly.write_report(hourly_file, designs)
+        chunks = [([grid.grid_design(designs, position) for position in range(len(space))], economics.optimal_designs(designs))]
+    elif engine == "search":
+        designs, search_optimal, stats = search.branch_and_bound(ODs, schedules, materials, heat_exchangers_dict, sections, min_pressure, target, lifetime, solver, index, keep_front=pareto_file is not None)
+        print(f"Solved {stats['solved']} of {stats['designs']} designs, skipped {stats['infeasible']} infeasible and {stats['dominated']} dominated designs")
+        instrument.count("pruned_infeasible", stats["infeasible"])
+        instrument.count("pruned_dominated", stats["dominated"])
+        chunks = [(designs, search_optimal)]
+    else:
+        chunks = sweep.sweep(space, sections, min_pressure, target, lifetime, solver, workers, index=index, share_cache=cache_file is not None)
+
+    #Scope optimal designs
+    optimal = {}
+
+    #Open output files
+    widths = sinks.string_widths(materials, heat_exchangers_dict["Design"], pumps_dict["ID"])
+    result_sinks = [sinks.open_sink(format, path, len(sections), widths) for format, path in outputs]
+    front = pareto.ParetoFront() if pareto_file is not None else None
+    for designs, chunk_optimal in chunks:
+
+        #Output to files
+        with instrument.stage("write_results"):
+            for design in designs:
+                for sink in result_sinks:
+                    sink.write(design)
+
+        #Add to the pareto front, and count the designs by the reason they are not feasible
+        with instrument.stage("pareto_front"):
+            if front is not None:
+                for design in designs:
+                    front.add(design)
+        if instrument.enabled:
+            for design in designs:
+                instrument.count(f"designs_{design['reason'] or 'feasible'}")
+
+        #Check if the designs of this chunk are optimal and if so, save them
+        sweep.merge_optimal(optimal, chunk_optimal)
+
+    with instrument.stage("write_results"):
+        for sink in result_sinks:
+            sink.close()
+
+    #Output the pareto front to file
+    if front is not None:
+        with instrument.stage("pareto_front"):
+            pareto_sink = sinks.TextSink(pareto_file)
+            for design in front.front():
+                pareto_sink.write(design)
+            pareto_sink.close()
+
+    #Save the hydraulic results for later runs
+    with instrument.stage("save_cache"):
+        if cache_file is not None: cache.save(cache_file, solvers.hydraulics_key())
 
     #Output optimal designs to file
-    with open(f"optimal_{target}_results.txt", "w") as file:
-        file.write("----------------------------------------------------------------------------------------------\n")
-        file.write("Design that is optimized for capital cost:\n")
-        file.write(f"OD of {minimum_capital_cost_design[0]} inch schedule {minimum_capital_cost_design[1]} {minimum_capital_cost_design[2]} pipe with {minimum_capital_cost_design[3]} heat exchanger\n")
-        file.write(f"Total length of pipe: {minimum_capital_cost_design[4]}m\n")
-        file.write(f"Total capital cost: ${minimum_capital_cost_design[5]}\n")
-        file.write(f"Total operating cost: ${minimum_capital_cost_design[6]}/hr\n")
-        file.write(f"Total lifetime cost over {minimum_capital_cost_design[7]} years: ${minimum_capital_cost_design[8]}\n")
-        file.write(f"Total power consumption: {minimum_capital_cost_design[9]}kW\n")
-        file.write(f"Section 1 uses {minimum_capital_cost_design[10]}m of pipe with the {minimum_capital_cost_design[11]} {minimum_capital_cost_design[12]}RPM pump\n")
-        file.write(f"Section 2 uses {minimum_capital_cost_design[13]}m of pipe with the {minimum_capital_cost_design[14]} {minimum_capital_cost_design[15]}RPM pump\n")
-        file.write(f"Section 3 uses {minimum_capital_cost_design[16]}m of pipe with the {minimum_capital_cost_design[17]} {minimum_capital_cost_design[18]}RPM pump\n")
-        file.write(f"Section 4 uses {minimum_capital_cost_design[19]}m of pipe with the {minimum_capital_cost_design[20]} {minimum_capital_cost_design[21]}RPM pump\n")
+    with instrument.stage("write_optimal"), open(f"optimal_{target}_results.txt", "w") as file:
+        write_optimal(file, "Design that is optimized for capital cost:", optimal["total_capital_cost"])
         file.write("\n\n\n")
-
-        file.write("----------------------------------------------------------------------------------------------\n")
-        file.write("Design that is optimized for operating cost:\n")
-        file.write(f"OD of {minimum_operating_cost_design[0]} inch schedule {minimum_operating_cost_design[1]} {minimum_operating_cost_design[2]} pipe with {minimum_operating_cost_design[3]} heat exchanger\n")
-        file.write(f"Total length of pipe: {minimum_operating_cost_design[4]}m\n")
-        file.write(f"Total capital cost: ${minimum_operating_cost_design[5]}\n")
-        file.write(f"Total operating cost: ${minimum_operating_cost_design[6]}/hr\n")
-        file.write(f"Total lifetime cost over {minimum_operating_cost_design[7]} years: ${minimum_operating_cost_design[8]}\n")
-        file.write(f"Total power consumption: {minimum_operating_cost_design[9]}kW\n")
-        file.write(f"Section 1 uses {minimum_operating_cost_design[10]}m of pipe with the {minimum_operating_cost_design[11]} {minimum_operating_cost_design[12]}RPM pump\n")
-        file.write(f"Section 2 uses {minimum_operating_cost_design[13]}m of pipe with the {minimum_operating_cost_design[14]} {minimum_operating_cost_design[15]}RPM pump\n")
-        file.write(f"Section 3 uses {minimum_operating_cost_design[16]}m of pipe with the {minimum_operating_cost_design[17]} {minimum_operating_cost_design[18]}RPM pump\n")
-        file.write(f"Section 4 uses {minimum_operating_cost_design[19]}m of pipe with the {minimum_operating_cost_design[20]} {minimum_operating_cost_design[21]}RPM pump\n")
+        write_optimal(file, "Design that is optimized for operating cost:", optimal["total_operating_cost"])
         file.write("\n\n\n")
-
-        file.write("----------------------------------------------------------------------------------------------\n")
-        file.write(f"Design that is optimized for lifetime cost over {lifetime} years:\n")
-        file.write(f"OD of {minimum_lifetime_cost_design[0]} inch schedule {minimum_lifetime_cost_design[1]} {minimum_lifetime_cost_design[2]} pipe with {minimum_lifetime_cost_design[3]} heat exchanger\n")
-        file.write(f"Total length of pipe: {minimum_lifetime_cost_design[4]}m\n")
-        file.write(f"Total capital cost: ${minimum_lifetime_cost_design[5]}\n")
-        file.write(f"Total operating cost: ${minimum_lifetime_cost_design[6]}/hr\n")
-        file.write(f"Total lifetime cost over {minimum_lifetime_cost_design[7]} years: ${minimum_lifetime_cost_design[8]}\n")
-        file.write(f"Total power consumption: {minimum_lifetime_cost_design[9]}kW\n")
-        file.write(f"Section 1 uses {minimum_lifetime_cost_design[10]}m of pipe with the {minimum_lifetime_cost_design[11]} {minimum_lifetime_cost_design[12]}RPM pump\n")
-        file.write(f"Section 2 uses {minimum_lifetime_cost_design[13]}m of pipe with the {minimum_lifetime_cost_design[14]} {minimum_lifetime_cost_design[15]}RPM pump\n")
-        file.write(f"Section 3 uses {minimum_lifetime_cost_design[16]}m of pipe with the {minimum_lifetime_cost_design[17]} {minimum_lifetime_cost_design[18]}RPM pump\n")
-        file.write(f"Section 4 uses {minimum_lifetime_cost_design[19]}m of pipe with the {minimum_lifetime_cost_design[20]} {minimum_lifetime_cost_design[21]}RPM pump\n")
+        write_optimal(file, f"Design that is optimized for lifetime cost over {lifetime} years:", optimal["total_lifetime_cost"])
         file.write("\n\n\n")
+        write_optimal(file, "Design that is optimized for power consumption:", optimal["total_power"])
+
+    #Sample the uncertain inputs and evaluate every design in each scenario
+    if scenarios > 0:
+        results = sensitivity.sensitivity(ODs, schedules, materials, heat_exchangers_dict, sections, min_pressure, target, pumps_dict, scenarios, rate=discount_rate)
+        with instrument.stage("write_sensitivity"):
+            sensitivity.write_report(sensitivity_file, results)
 
-        file.write("----------------------------------------------------------------------------------------------\n")
-        file.write("Design that is optimized for power consumption:\n")
-        file.write(f"OD of {minimum_power_design[0]} inch schedule {minimum_power_design[1]} {minimum_power_design[2]} pipe with {minimum_power_design[3]} heat exchanger\n")
-        file.write(f"Total length of pipe: {minimum_power_design[4]}m\n")
-        file.write(f"Total capital cost: ${minimum_power_design[5]}\n")
-        file.write(f"Total operating cost: ${minimum_power_design[6]}/hr\n")
-        file.write(f"Total lifetime cost over {minimum_power_design[7]} years: ${minimum_power_design[8]}\n")
-        file.write(f"Total power consumption: {minimum_power_design[9]}kW\n")
-        file.write(f"Section 1 uses {minimum_power_design[10]}m of pipe with the {minimum_power_design[11]} {minimum_power_design[12]}RPM pump\n")
-        file.write(f"Section 2 uses {minimum_power_design[13]}m of pipe with the {minimum_power_design[14]} {minimum_power_design[15]}RPM pump\n")
-        file.write(f"Section 3 uses {minimum_power_design[16]}m of pipe with the {minimum_power_design[17]} {minimum_power_design[18]}RPM pump\n")
-        file.write(f"Section 4 uses {minimum_power_design[19]}m of pipe with the {minimum_power_design[20]} {minimum_power_design[21]}RPM pump\n")
\ No newline at end of file
+    #Output the time spent in each stage and the profile of the run
+    if profile_file is not None: instrument.stop_profile(profile_file)
+    if instrument_file is not None: instrument.save(instrument_file)
@@ -0,0 +1,107 @@
+import heapq
+import numpy as np
+
+#Objectives that the front is kept over, all of which are minimized
+objectives = ["total_capital_cost", "total_operating_cost", "total_lifetime_cost", "total_power"]
+
+#Largest number of pairs of points compared at once when checking for dominance
+comparison_size = 1 << 20
+
+#Mask of the points in b which are dominated by at least one point in a
+#A point dominates another if it is no worse in every objective and better in at least one
+def dominated(a, b):
+
+    mask = np.zeros(len(b), dtype=bool)
+    if len(a) == 0:
+        return mask
+
+    chunk = max(1, comparison_size // len(a))
+    for start in range(0, len(b), chunk):
+        points = b[start:start + chunk, np.newaxis, :]
+        no_worse = np.all(a[np.newaxis, :, :] <= points, axis=-1)
+        better = np.any(a[np.newaxis, :, :] < points, axis=-1)
+        mask[start:start + chunk] = np.any(no_worse & better, axis=-1)
+
+    return mask
+
+#Skyline of a set of points with sort-filter-skyline: once the points are sorted by the sum of their objectives,
+#a point can only be dominated by points before it, so each point is only checked against the skyline found so far
+def skyline(points):
+
+    order = np.argsort(points.sum(axis=1), kind="stable")
+    window = np.empty(points.shape)
+    kept = []
+    for i in order:
+        point = points[i]
+        if kept:
+            current = window[:len(kept)]
+            if np.any(np.all(current <= point, axis=1) & np.any(current < point, axis=1)):
+                continue
+        window[len(kept)] = point
+        kept.append(i)
+
+    return np.sort(np.asarray(kept, dtype=int))
+
+#Non-dominated set of feasible designs over the objectives, built incrementally as designs are produced
+#Designs are buffered in blocks, and each block is filtered against the front and reduced to its own skyline before
+#being merged, so only the front and one block are ever held in memory
+class ParetoFront:
+
+    def __init__(self, objectives=objectives, k=10, block_size=4096):
+        self.objectives = objectives
+        self.k = k
+        self.block_size = block_size
+        self.designs = []
+        self.points = np.empty((0, len(objectives)))
+        self.block = []
+        self.count = 0
+
+        #Heaps of the k best designs for each objective, with the worst of them at the top
+        self.heaps = {key: [] for key in objectives}
+
+    #Add a design, designs which are not feasible are ignored
+    def add(self, design):
+        if design["reason"] is not None:
+            return
+
+        self.count += 1
+        for key in self.objectives:
+            heap = self.heaps[key]
+            item = (-design[key], -self.count, design)
+            if len(heap) < self.k:
+                heapq.heappush(heap, item)
+            elif design[key] < -heap[0][0]:
+                heapq.heapreplace(heap, item)
+
+        self.block.append(design)
+        if len(self.block) >= self.block_size:
+            self.flush()
+
+    #Merge the buffered block of designs into the front
+    def flush(self):
+        if not self.block:
+            return
+
+        points = np.array([[design[key] for key in self.objectives] for design in self.block], dtype=float)
+        block = self.block
+        self.block = []
+
+        #Drop the designs which the front already dominates, then reduce the rest of the block to its skyline
+        keep = np.flatnonzero(~dominated(self.points, points))
+        keep = keep[skyline(points[keep])]
+        points = points[keep]
+
+        #Drop the designs on the front which the block dominates
+        front = ~dominated(points, self.points)
+        self.designs = [design for design, kept in zip(self.designs, front) if kept] + [block[i] for i in keep]
+        self.points = np.concatenate([self.points[front], points])
+
+    #Designs on the front, in the order that they were added
+    def front(self):
+        self.flush()
+        return list(self.designs)
+
+    #Up to k designs with the lowest value of an objective, best first, earlier designs first when equal
+    def top(self, key, k=None):
+        best = sorted(self.heaps[key], key=lambda item: (-item[0], -item[1]))
+        return [item[2] for item in best[:k]]
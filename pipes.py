@@ -0,0 +1,10 @@
+pipes_dict = {
+  "schedule": [40, 40, 80, 80],
+  "material": ["Steel", "PVC", "Steel", "PVC"],
+  "wall_slope": [0.021, 0.021, 0.039, 0.039],
+  "wall_intercept": [0.112, 0.112, 0.14, 0.14],
+  "max_pressure": [154.71, 154.71, 225.04, 225.04],
+  "cost_slope": [10, 5, 15, 10],
+  "cost_intercept": [30, 40, 60, 80],
+  "roughness": [0.1 / 1000, 0.001 / 1000, 0.1 / 1000, 0.001 / 1000],
+}
@@ -0,0 +1,194 @@
+import bisect
+import equations
+import pumps
+import instrument
+import numpy as np
+
+#Price of electricity used for the operating cost of pumps
+electricity_price = 0.16
+
+#Discount rate of future operating costs, 0 adds up the operating costs over the lifetime without discounting
+discount_rate = 0
+
+#Indexes of the built in pump catalog, built once for each lifetime, price of electricity, and discount rate
+default_indexes = {}
+
+#Electrical power required of a pump to supply the given head, in kilowatts
+#Other values of the density and flow are given as properties, like the functions in equations.py
+def pump_power(pump_head, efficiency, properties=None):
+    if properties is None: properties = {}
+    power = pump_head * properties.get("density", equations.density) * equations.gravity * properties.get("flow", equations.flow) #Hydraulic power required of pump in watts
+    power = (power / efficiency) / 1000 #Electrical power required of pump, in kilowatts (taking into account the efficiency)
+    return power
+
+#Number of years of operating cost that the operating costs over the lifetime are worth today
+def present_worth(lifetime, rate=None):
+    if rate is None: rate = discount_rate
+    if rate == 0:
+        return lifetime
+    return (1 - (1 + rate) ** -lifetime) / rate
+
+#Operating cost in $/hr and cost over the lifetime of a pump, at the module's price of electricity and discount rate unless given
+def pump_costs(capital_cost, power, lifetime, price=None, rate=None):
+    if price is None: price = electricity_price
+    operating_cost = power * 3600 * price #Operating cost in $/hr
+    total_operating_cost = operating_cost * 24 * 365 * present_worth(lifetime, rate) #Operating cost over lifetime
+    total_cost = capital_cost + total_operating_cost
+    return operating_cost, total_cost
+
+#Build an index of a pump catalog sorted by head
+#For every position in the sorted catalog the index holds the best pump out of all pumps with at least that much head,
+#so that the best pump for a required head is a binary search followed by a lookup
+#The index is built for a price of electricity and discount rate, which default to those of the module
+@instrument.timed("build_pump_index")
+def build_pump_index(pumps_dict=pumps.pumps_dict, lifetime=50, price=None, rate=None):
+
+    if price is None: price = electricity_price
+    if rate is None: rate = discount_rate
+
+    cost = np.asarray(pumps_dict["cost"], dtype=float)
+    efficiency = np.asarray(pumps_dict["efficiency"], dtype=float)
+    head = np.asarray(pumps_dict["head"], dtype=float)
+    order = np.argsort(head, kind="stable")
+    n = len(order)
+
+    #Suffix minimums of capital cost and power, ties go to the first pump in the catalog
+    #Power is lowest for the highest efficiency, unless the required head is negative (lowest efficiency) or zero (every pump is equal)
+    capital = np.empty(n, dtype=int)
+    power = np.empty(n, dtype=int)
+    negative_power = np.empty(n, dtype=int)
+    first = np.empty(n, dtype=int)
+    for i in range(n - 1, -1, -1):
+        pump = order[i]
+        capital[i] = pump if i == n - 1 or (cost[pump], pump) < (cost[capital[i + 1]], capital[i + 1]) else capital[i + 1]
+        power[i] = pump if i == n - 1 or (-efficiency[pump], pump) < (-efficiency[power[i + 1]], power[i + 1]) else power[i + 1]
+        negative_power[i] = pump if i == n - 1 or (efficiency[pump], pump) < (efficiency[negative_power[i + 1]], negative_power[i + 1]) else negative_power[i + 1]
+        first[i] = pump if i == n - 1 else min(pump, first[i + 1])
+
+    #Lifetime cost is a line in the required head for each pump, so the suffix minimum is a lower envelope of lines
+    #Each pump is added to the envelope in turn, and only the pieces of the envelope which fall between consecutive heads of the
+    #sorted catalog are kept, found by a binary search on the heads where the pieces meet
+    slope = pump_costs(0, pump_power(1, efficiency), lifetime, price, rate)[1]
+    envelope = []
+    keys = []
+    pieces = [[] for i in range(n)]
+    breaks = [[] for i in range(n)]
+    for i in range(n - 1, -1, -1):
+        add_to_envelope(envelope, keys, order[i], cost, slope)
+        low = head[order[i - 1]] if i > 0 else -np.inf
+        end = lambda j: envelope_break(envelope[j], envelope[j + 1], cost, slope) if j < len(envelope) - 1 else np.inf
+        j = bisect.bisect_left(range(len(envelope) - 1), low, key=end)
+        while j < len(envelope) and (j == 0 or end(j - 1) <= head[order[i]]):
+            pieces[i].append(envelope[j])
+            breaks[i].append(end(j))
+            j += 1
+
+    offsets = np.cumsum([0] + [len(piece) for piece in pieces])
+
+    return {
+        "pumps_dict": pumps_dict,
+        "lifetime": lifetime,
+        "price": price,
+        "rate": rate,
+        "cost": cost,
+        "efficiency": efficiency,
+        "head": head[order],
+        "capital": capital,
+        "power": power,
+        "negative_power": negative_power,
+        "first": first,
+        "cost_pieces": np.asarray([pump for piece in pieces for pump in piece], dtype=int),
+        "cost_breaks": np.asarray([end for piece in breaks for end in piece], dtype=float),
+        "cost_offsets": offsets,
+    }
+
+#Head at which the lifetime cost of pump b drops below that of pump a, where pump a has the larger slope
+def envelope_break(a, b, cost, slope):
+    return (cost[b] - cost[a]) / (slope[a] - slope[b])
+
+#Add a line cost + slope * head to a lower envelope of lines, ordered from the lowest head to the highest (the largest slope first)
+#keys holds the order of the lines of the envelope for the binary search. Lines which the new line leaves on the envelope at a
+#single head at most are removed, and so is the new line if it is not on the envelope, the same as if the envelope were found again
+def add_to_envelope(envelope, keys, pump, cost, slope):
+
+    key = (-slope[pump], cost[pump], pump)
+    position = bisect.bisect_left(keys, key)
+
+    #For equal slopes only the cheapest (then first in the catalog) can be on the envelope
+    if position > 0 and slope[envelope[position - 1]] == slope[pump]:
+        return
+    if position < len(envelope) and slope[envelope[position]] == slope[pump]:
+        del envelope[position], keys[position]
+
+    #The line is not on the envelope if the lines either side of it meet below it
+    if 0 < position < len(envelope) and envelope_break(envelope[position - 1], envelope[position], cost, slope) <= envelope_break(envelope[position - 1], pump, cost, slope):
+        return
+
+    while position >= 2 and envelope_break(envelope[position - 2], pump, cost, slope) <= envelope_break(envelope[position - 2], envelope[position - 1], cost, slope):
+        position -= 1
+        del envelope[position], keys[position]
+    while position + 1 < len(envelope) and envelope_break(pump, envelope[position + 1], cost, slope) <= envelope_break(pump, envelope[position], cost, slope):
+        del envelope[position], keys[position]
+
+    envelope.insert(position, pump)
+    keys.insert(position, key)
+
+#Index of the pump in the catalog which best meets the target for each required head, or -1 where no pump has enough head
+#The target is "capital" for the lowest capital cost, "cost" for the lowest lifetime cost, or "power" for the lowest power
+#Physical properties other than those the index was built with are given as properties, like the functions in equations.py
+@instrument.timed("select_pump")
+def select_pump(index, pump_head, target, properties=None):
+
+    pump_head = np.asarray(pump_head, dtype=float)
+    position = np.searchsorted(index["head"], pump_head, side="left")
+    available = position < len(index["head"])
+    position = np.where(available, position, 0)
+
+    if len(index["head"]) == 0:
+        selected = np.full(pump_head.shape, -1)
+
+    elif target == "capital":
+        selected = index["capital"][position]
+
+    elif target == "power":
+        selected = np.where(pump_head > 0, index["power"][position], np.where(pump_head < 0, index["negative_power"][position], index["first"][position]))
+
+    elif target == "cost":
+        #Binary search for the piece of the envelope in every design at once
+        low = index["cost_offsets"][position]
+        high = index["cost_offsets"][position + 1] - 1
+        searching = low < high
+        while np.any(searching):
+            middle = (low + high) // 2
+            right = index["cost_breaks"][middle] < pump_head
+            low = np.where(searching & right, middle + 1, low)
+            high = np.where(searching & ~right, middle, high)
+            searching = low < high
+
+        #Check the neighbouring pieces with the exact lifetime cost, in case of rounding in the break points
+        start = index["cost_offsets"][position]
+        end = index["cost_offsets"][position + 1] - 1
+        selected = None
+        for piece in [low - 1, low, low + 1]:
+            piece = np.clip(piece, start, end)
+            pump = index["cost_pieces"][piece]
+            total_cost = pump_costs(index["cost"][pump], pump_power(pump_head, index["efficiency"][pump], properties), index["lifetime"], index["price"], index["rate"])[1]
+            if selected is None:
+                selected, best = pump, total_cost
+            else:
+                better = (total_cost < best) | ((total_cost == best) & (pump < selected))
+                selected = np.where(better, pump, selected)
+                best = np.where(better, total_cost, best)
+
+    else:
+        raise ValueError(f"Unknown target for pump selection: {target}")
+
+    selected = np.where(available, selected, -1)
+    return selected.item() if selected.ndim == 0 else selected
+
+#Index of the built in pump catalog for the given lifetime, at the module's price of electricity and discount rate
+def default_index(lifetime):
+    key = (lifetime, electricity_price, discount_rate)
+    if key not in default_indexes:
+        default_indexes[key] = build_pump_index(pumps.pumps_dict, lifetime)
+    return default_indexes[key]
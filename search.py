@@ -0,0 +1,152 @@
+import math
+import numpy as np
+import equations
+import solvers
+import pump_index
+import sweep
+import pareto
+import instrument
+
+#Relative slack on the lower bounds, so that rounding can never prune a design which ties with an optimal design
+slack = 1e-9
+
+#Parts of the lower bounds on the objectives of a schedule and material for every heat exchanger and OD, computed once for the
+#branches of the schedule and material as arrays with a row for each heat exchanger. A larger OD has a larger inner diameter, which lowers the velocity, p2, and head loss but raises the cost of pipe, so a range of
+#ODs has its heads bounded at its largest OD and its pipe cost at its smallest. The values which depend on the heads are found at
+#every OD as if it were the largest of a range, and the pipe cost at every OD as if it were the smallest, so that design_bounds
+#only combines the values at the two ends of a range. Slant only adds length and pump head (y >= 0), so each section is bounded
+#with y = 0, which is valid as long as head loss increases with length and falls with diameter.
+@instrument.timed("branch_bounds")
+def branch_bounds(ODs, schedule, material, heat_exchangers_dict, sections, min_pressure, lifetime, index):
+
+    diameter, roughness, pipe_cost, max_pressure = solvers.pipe_properties(np.asarray(ODs, dtype=float), schedule, material)
+    p0, p2 = equations.pressures(diameter, np.asarray(heat_exchangers_dict["k"], dtype=float)[:, np.newaxis], min_pressure)
+    bounds = {
+        "hx_cost": np.asarray(heat_exchangers_dict["Cost"], dtype=float),
+        "pipe_cost": pipe_cost,
+        "pressure": p2 > max_pressure,
+        "roughness_term": ((roughness / diameter) / 3.7) ** 1.11,
+        "reynolds_term": [],
+        "pump": [],
+        "total_length": 0,
+    }
+    bounds.update({key: np.zeros(p2.shape) for key in sweep.objectives})
+
+    for z0, z2, adjacent in sections:
+        length0 = (z0 - (60 - solvers.x)) + adjacent
+        length1 = z2 - (60 - solvers.x)
+        bounds["total_length"] = bounds["total_length"] + length0 + length1
+        bounds["reynolds_term"].append(6.9 / equations.reynolds(length1, diameter))
+
+        #Minimum required pump head, and the best value of each objective over the pumps with at least that head
+        pump_head = z2 - 62 + p2 + equations.hloss(length1, diameter, roughness) + solvers.x
+        capital = pump_index.select_pump(index, pump_head, "capital")
+        bounds["pump"].append(capital >= 0)
+        power = pump_index.pump_power(pump_head, index["efficiency"][pump_index.select_pump(index, pump_head, "power")])
+        cheapest = pump_index.select_pump(index, pump_head, "cost")
+        total_cost = pump_index.pump_costs(index["cost"][cheapest], pump_index.pump_power(pump_head, index["efficiency"][cheapest]), lifetime, index["price"], index["rate"])[1]
+
+        bounds["total_capital_cost"] += index["cost"][capital]
+        bounds["total_operating_cost"] += pump_index.pump_costs(0, power, lifetime, index["price"], index["rate"])[0]
+        bounds["total_lifetime_cost"] += total_cost
+        bounds["total_power"] += power
+
+    return bounds
+
+#Lower bounds on the objectives of every design with heat exchanger h and an OD between positions low and high of the branch
+#bounds, or None if none of them can be feasible
+def design_bounds(bounds, h, low, high):
+
+    #Pressure after the heat exchanger is lowest at the largest OD
+    if bounds["pressure"][h, high]:
+        return None
+
+    for reynolds_term, pump in zip(bounds["reynolds_term"], bounds["pump"]):
+        #Head loss is only monotone while the log term of the friction factor is small, otherwise do not bound the section
+        if bounds["roughness_term"][low] + reynolds_term[high] >= math.exp(-2):
+            return {key: -math.inf for key in sweep.objectives}
+        if not pump[h, high]:
+            return None
+
+    pipe_cost = bounds["pipe_cost"][low] * bounds["total_length"] + bounds["hx_cost"][h]
+    result = {key: bounds[key][h, high].item() for key in sweep.objectives}
+    result["total_capital_cost"] += pipe_cost
+    result["total_lifetime_cost"] += pipe_cost
+    return result
+
+#A branch is dominated if it cannot beat the current optimal design in any objective
+def dominated(bounds, optimal):
+    for key in sweep.objectives:
+        if key not in optimal or bounds[key] - abs(bounds[key]) * slack <= optimal[key][0]:
+            return False
+    return True
+
+#A branch is off the pareto front if a feasible design found so far dominates its lower bounds, so that it dominates every design
+#of the branch as well
+def off_front(bounds, front):
+    point = np.array([[bounds[key] - abs(bounds[key]) * slack for key in sweep.objectives]])
+    return bool(pareto.dominated(front, point)[0])
+
+#Add the objectives of a feasible design to the points of the front found so far, unless a point on it dominates the design
+def add_to_front(front, design):
+    point = np.array([[design[key] for key in sweep.objectives]])
+    if pareto.dominated(front, point)[0]:
+        return front
+    return np.concatenate([front[~pareto.dominated(point, front)], point])
+
+#Search for the optimal designs with branch and bound, giving the same optimal designs as an exhaustive sweep
+#Every schedule, material, and heat exchanger is a branch over the range of ODs, which is split in half until it is
+#either pruned (infeasible or dominated by the optimal designs found so far) or down to a single design to solve.
+#A design can be on the pareto front without being optimal in any one objective, so when the front is kept (keep_front) a branch
+#is only pruned as dominated if it is also off the front found so far, and the solved designs then give the same front as the sweep.
+#Returns the solved designs in sweep order, the optimal designs, and the number of designs solved and skipped.
+@instrument.timed("branch_and_bound")
+def branch_and_bound(ODs, schedules, materials, heat_exchangers_dict, sections, min_pressure, target, lifetime, method="substitution", index=None, keep_front=False):
+
+    if index is None: index = pump_index.default_index(lifetime)
+    heat_exchangers = list(zip(heat_exchangers_dict["Design"], heat_exchangers_dict["Cost"], heat_exchangers_dict["k"]))
+    order = sorted(range(len(ODs)), key=lambda i: ODs[i])
+
+    #Optimal value, position in the sweep, and design for each objective, ties go to the earlier position like the sweep
+    optimal = {}
+    front = np.empty((0, len(sweep.objectives)))
+    solved = []
+    stats = {"designs": len(ODs) * len(schedules) * len(materials) * len(heat_exchangers), "solved": 0, "infeasible": 0, "dominated": 0}
+
+    for j, schedule in enumerate(schedules):
+        for l, material in enumerate(materials):
+            branch = branch_bounds([ODs[i] for i in order], schedule, material, heat_exchangers_dict, sections, min_pressure, lifetime, index)
+            for h, (hx_name, hx_cost, k) in enumerate(heat_exchangers):
+
+                #Depth first, with the larger ODs (lower head loss) searched first
+                branches = [(0, len(order) - 1)]
+                while branches:
+                    low, high = branches.pop()
+                    bounds = design_bounds(branch, h, low, high)
+                    if bounds is None:
+                        stats["infeasible"] += high - low + 1
+                        continue
+                    if dominated(bounds, optimal) and (not keep_front or off_front(bounds, front)):
+                        stats["dominated"] += high - low + 1
+                        continue
+                    if low < high:
+                        middle = (low + high) // 2
+                        branches.append((low, middle))
+                        branches.append((middle + 1, high))
+                        continue
+
+                    OD = ODs[order[low]]
+                    design = solvers.solve_design(OD, schedule, material, hx_name, hx_cost, k, sections, min_pressure, target, lifetime, False, method, index)
+                    position = ((order[low] * len(schedules) + j) * len(materials) + l) * len(heat_exchangers) + h
+                    solved.append((position, design))
+                    stats["solved"] += 1
+
+                    if design["reason"] is None:
+                        for key in sweep.objectives:
+                            if key not in optimal or (design[key], position) < optimal[key][:2]:
+                                optimal[key] = (design[key], position, design)
+                        if keep_front:
+                            front = add_to_front(front, design)
+
+    solved.sort(key=lambda item: item[0])
+    return [design for position, design in solved], {key: value[2] for key, value in optimal.items()}, stats
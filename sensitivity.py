@@ -0,0 +1,195 @@
+import csv
+import numpy as np
+import equations
+import solvers
+import grid
+import economics
+import pump_index
+import sweep
+import instrument
+
+#Uncertain inputs and how they are sampled, as ("normal", mean, standard deviation), ("lognormal", median, standard deviation
+#of the log), ("uniform", low, high), or ("fixed", value)
+#Density, viscosity, flow, and roughness are factors on their point estimates in equations.py and the pipe catalog,
+#the price of electricity and lifetime are sampled directly
+inputs = {
+    "density": ("normal", 1, 0.005),
+    "viscosity": ("lognormal", 1, 0.1),
+    "flow": ("lognormal", 1, 0.1),
+    "roughness": ("lognormal", 1, 0.5),
+    "electricity_price": ("uniform", 0.10, 0.25),
+    "lifetime": ("uniform", 30, 70),
+}
+
+#Range and number of the logarithmic bins that the lifetime cost of every design is counted in, for its percentiles
+cost_range = (1e3, 1e12)
+bins = 1000
+
+#Sample a distribution n times
+def sample(distribution, n, rng):
+    kind = distribution[0]
+    if kind == "normal": return rng.normal(distribution[1], distribution[2], n)
+    if kind == "lognormal": return distribution[1] * np.exp(rng.normal(0, distribution[2], n))
+    if kind == "uniform": return rng.uniform(distribution[1], distribution[2], n)
+    if kind == "fixed": return np.full(n, float(distribution[1]))
+    raise ValueError(f"Unknown distribution: {kind}")
+
+#Sample every uncertain input for n scenarios
+def sample_inputs(n, seed=0, inputs=inputs):
+    rng = np.random.default_rng(seed)
+    return {name: sample(distribution, n, rng) for name, distribution in inputs.items()}
+
+#Evaluate every design in the grid for a chunk of scenarios at once
+#Arrays are designs by scenarios, with the scenarios along the last axis so that the sampled physical properties broadcast
+#through the equations. Returns the reason each design is not feasible in each scenario, and the totals of each objective.
+def evaluate_scenarios(pipes, sections, min_pressure, target, pumps, samples, method="substitution", rate=None):
+
+    if rate is None: rate = pump_index.discount_rate
+    lifetime = samples["lifetime"]
+    price = samples["electricity_price"]
+    index = {"cost": pumps["cost"], "efficiency": pumps["efficiency"], "price": price, "rate": rate}
+
+    #The flow is set by the heat demand, so a denser fluid carries the same heat with less flow
+    density = equations.density * samples["density"]
+    flow = equations.flow * samples["flow"] * (equations.density / density)
+    properties = {"density": density, "viscosity": equations.viscosity * samples["viscosity"], "flow": flow}
+
+    diameter = pipes["diameter"][:, np.newaxis]
+    roughness = pipes["roughness"][:, np.newaxis] * samples["roughness"]
+    p0, p2 = equations.pressures(diameter, pipes["k"][:, np.newaxis], min_pressure, properties)
+    shape = np.broadcast_shapes(diameter.shape, roughness.shape)
+
+    #Solve each section for every design and scenario, and pick its pump
+    totals = {"length": 0, "capital_cost": 0, "operating_cost": 0, "total_cost": 0, "power": 0}
+    diverged = np.zeros(shape, dtype=bool)
+    missing = np.zeros(shape, dtype=bool)
+    for z0, z2, adjacent in sections:
+        length0, y, section_diverged, iterations = solvers.solve_section0_batch(diameter, roughness, np.broadcast_to(p0, shape), z0, adjacent, method, properties=properties)
+        with np.errstate(invalid="ignore"):
+            length1, pump_head = solvers.solve_section1(diameter, roughness, p2, y, z2, False, properties)
+        selected = economics.select_candidates(pumps, pump_head, np.searchsorted(pumps["head"], pump_head, side="left"), target, lifetime, price, rate, properties)
+        selected, capital_cost, operating_cost, total_cost, power = grid.pump_values(selected, pump_head, lifetime, index, properties)
+
+        for key, value in zip(totals, [length0 + length1, capital_cost, operating_cost, total_cost, power]):
+            totals[key] = totals[key] + value
+        diverged |= section_diverged
+        missing |= selected < 0
+
+    #Reason that each design is not feasible, in the same order of precedence as the sweep
+    reason = np.full(shape, grid.FEASIBLE)
+    reason[missing] = grid.PUMP
+    reason[diverged] = grid.DIVERGED
+    reason[np.broadcast_to(p2 > pipes["max_pressure"][:, np.newaxis], shape)] = grid.PRESSURE
+
+    #Find total capital cost, operating cost, and power
+    total_pipe_cost = pipes["pipe_cost"][:, np.newaxis] * totals["length"]
+    hx_cost = pipes["hx_cost"][:, np.newaxis]
+    return {
+        "reason": reason,
+        "total_capital_cost": total_pipe_cost + totals["capital_cost"] + hx_cost,
+        "total_operating_cost": totals["operating_cost"],
+        "total_lifetime_cost": totals["total_cost"] + total_pipe_cost + hx_cost,
+        "total_power": totals["power"],
+    }
+
+#Monte Carlo sensitivity analysis of every combination of pipe and heat exchanger over sampled scenarios of the uncertain inputs
+#Scenarios are evaluated in chunks so that memory stays bounded, and only running counts are kept between chunks: how often
+#each design is feasible and optimal for each objective, and the sum, sum of squares, range, and histogram of its lifetime cost
+@instrument.timed("sensitivity")
+def sensitivity(ODs, schedules, materials, heat_exchangers_dict, sections, min_pressure, target, pumps_dict, scenarios, seed=0, method="secant", rate=None, chunk_size=None):
+
+    pipes = grid.grid_pipes(ODs, schedules, materials, heat_exchangers_dict, min_pressure)
+    pumps = economics.pump_table(pumps_dict)
+    samples = sample_inputs(scenarios, seed)
+    n = len(pipes["diameter"])
+    if chunk_size is None: chunk_size = max(1, grid.batch_size // (n * max(1, pumps["candidates"].shape[1])))
+    edges = np.geomspace(cost_range[0], cost_range[1], bins + 1)
+
+    results = {
+        "designs": [(pipes["ODs"][i], pipes["schedules"][j], pipes["materials"][l], pipes["heat_exchangers"][h]) for i, j, l, h in zip(pipes["OD_index"], pipes["schedule_index"], pipes["material_index"], pipes["hx_index"])],
+        "scenarios": scenarios,
+        "feasible": np.zeros(n, dtype=int),
+        "optimal": {key: np.zeros(n, dtype=int) for key in sweep.objectives},
+        "none_feasible": 0,
+        "sum": np.zeros(n),
+        "sum_squares": np.zeros(n),
+        "min": np.full(n, np.inf),
+        "max": np.full(n, -np.inf),
+        "edges": edges,
+        "histogram": np.zeros(n * bins, dtype=np.int64),
+    }
+
+    for start in range(0, scenarios, chunk_size):
+        chunk = {name: values[start:start + chunk_size] for name, values in samples.items()}
+        evaluated = evaluate_scenarios(pipes, sections, min_pressure, target, pumps, chunk, method, rate)
+        feasible = evaluated["reason"] == grid.FEASIBLE
+        results["feasible"] += feasible.sum(axis=1)
+
+        #Optimal design of each scenario for each objective, the first design is kept when two are equal
+        any_feasible = feasible.any(axis=0)
+        results["none_feasible"] += int((~any_feasible).sum())
+        for key in sweep.objectives:
+            best = np.argmin(np.where(feasible, evaluated[key], np.inf), axis=0)
+            results["optimal"][key] += np.bincount(best[any_feasible], minlength=n)
+
+        #Distribution of the lifetime cost of each design over the scenarios where it is feasible
+        cost = np.where(feasible, evaluated["total_lifetime_cost"], 0)
+        results["sum"] += cost.sum(axis=1)
+        results["sum_squares"] += (cost ** 2).sum(axis=1)
+        results["min"] = np.minimum(results["min"], np.where(feasible, cost, np.inf).min(axis=1))
+        results["max"] = np.maximum(results["max"], np.where(feasible, cost, -np.inf).max(axis=1))
+        bin = np.clip(np.searchsorted(edges, cost, side="right") - 1, 0, bins - 1)
+        flat = np.arange(n)[:, np.newaxis] * bins + bin
+        results["histogram"] += np.bincount(flat[feasible], minlength=n * bins)
+
+    results["histogram"] = results["histogram"].reshape(n, bins)
+    return results
+
+#Percentile of the lifetime cost of each design from its histogram, interpolated within a bin on a log scale
+def percentile(results, q):
+
+    counts = results["histogram"]
+    cumulative = np.cumsum(counts, axis=1)
+    target = q / 100 * results["feasible"]
+    bin = np.minimum((cumulative < target[:, np.newaxis]).sum(axis=1), bins - 1)
+    before = np.take_along_axis(cumulative, bin[:, np.newaxis], axis=1)[:, 0] - np.take_along_axis(counts, bin[:, np.newaxis], axis=1)[:, 0]
+    inside = np.take_along_axis(counts, bin[:, np.newaxis], axis=1)[:, 0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fraction = np.clip(np.where(inside > 0, (target - before) / inside, 0), 0, 1)
+    low, high = np.log(results["edges"][bin]), np.log(results["edges"][bin + 1])
+    value = np.exp(low + fraction * (high - low))
+    return np.where(results["feasible"] > 0, np.clip(value, results["min"], results["max"]), np.nan)
+
+#Summary of every design: how often it is feasible and optimal, and the mean, spread, and percentiles of its lifetime cost
+def summary(results):
+
+    feasible = results["feasible"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = results["sum"] / feasible
+        std = np.sqrt(np.maximum(results["sum_squares"] / feasible - mean ** 2, 0))
+    percentiles = {q: percentile(results, q) for q in [5, 50, 95]}
+
+    rows = []
+    for i, (OD, schedule, material, heat_exchanger) in enumerate(results["designs"]):
+        row = {"OD": OD, "schedule": schedule, "material": material, "heat_exchanger": heat_exchanger, "feasible": feasible[i] / results["scenarios"]}
+        for key in sweep.objectives:
+            row[f"optimal_{key}"] = results["optimal"][key][i] / results["scenarios"]
+        feasible_design = feasible[i] > 0
+        row["lifetime_cost_mean"] = mean[i] if feasible_design else None
+        row["lifetime_cost_std"] = std[i] if feasible_design else None
+        row["lifetime_cost_min"] = results["min"][i] if feasible_design else None
+        for q, values in percentiles.items():
+            row[f"lifetime_cost_p{q}"] = values[i] if feasible_design else None
+        row["lifetime_cost_max"] = results["max"][i] if feasible_design else None
+        rows.append({key: value.item() if isinstance(value, np.generic) else value for key, value in row.items()})
+
+    return rows
+
+#Write the summary of every design to a CSV file, the designs which are optimal most often for the lifetime cost first,
+#then the designs with the lowest mean lifetime cost
+def write_report(path, results):
+    rows = sorted(summary(results), key=lambda row: (-row["optimal_total_lifetime_cost"], row["lifetime_cost_mean"] if row["lifetime_cost_mean"] is not None else float("inf")))
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
@@ -0,0 +1,256 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import signal
+import socket
+import stat
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+import numpy as np
+import solvers
+import pumps
+import heat_exchangers
+import grid
+import sweep
+import cache
+import catalogs
+import pump_index
+import economics
+import main
+
+#Number of pump indexes and hydraulic tables each process keeps warm, the least recently used are dropped first
+max_indexes = 64
+max_tables = 16
+
+#Catalogs, route, pump indexes, and hydraulic tables of the process answering requests, kept warm between requests by load
+pumps_dict = pumps.pumps_dict
+heat_exchangers_dict = heat_exchangers.heat_exchangers_dict
+sections = main.sections
+indexes = cache.LRUCache(max_indexes)
+tables = cache.LRUCache(max_tables)
+
+#Load the catalogs, the route, and the hydraulic results of earlier runs, and build the hydraulic table of the grid in main.py
+#Every process of the worker pool runs this once when it starts, so that requests never pay for it
+def load(pumps_file=None, pipes_file=None, heat_exchangers_file=None, cache_file=None, warm=True, route_file=None):
+    global pumps_dict, heat_exchangers_dict, sections
+    pumps_dict = catalogs.load_pumps(pumps_file) if pumps_file is not None else pumps.pumps_dict
+    heat_exchangers_dict = catalogs.load_heat_exchangers(heat_exchangers_file) if heat_exchangers_file is not None else heat_exchangers.heat_exchangers_dict
+    sections = catalogs.load_route(route_file) if route_file is not None else main.sections
+    if pipes_file is not None: solvers.set_pipe_catalog(catalogs.load_pipes(pipes_file))
+    if cache_file is not None and not cache.load(cache_file, solvers.hydraulics_key()):
+        print(f"Ignoring {cache_file}, it was saved with a different pipe catalog or constants", file=sys.stderr)
+    indexes.clear()
+    tables.clear()
+    if warm: best({})
+
+#Settings of a request, the settings in main.py (and the route loaded from its route_file) are used for anything the request leaves out
+def settings(request):
+    return {
+        "target": request.get("target", main.target),
+        "lifetime": request.get("lifetime", main.lifetime),
+        "price": request.get("price", main.electricity_price),
+        "rate": request.get("rate", main.discount_rate),
+        "min_pressure": request.get("min_pressure", main.min_pressure),
+        "method": request.get("method", main.solver),
+        "sections": [tuple(float(value) for value in section) for section in request.get("sections", sections)],
+    }
+
+#Index of the pump catalog for a lifetime, price of electricity, and discount rate
+def pump_index_for(lifetime, price, rate):
+    key = (lifetime, price, rate)
+    hit, index = indexes.get(key)
+    if not hit:
+        index = pump_index.build_pump_index(pumps_dict, lifetime, price, rate)
+        indexes.put(key, index)
+    return index
+
+#Heat exchangers of the catalog with the given names, in the order they are given
+def select_heat_exchangers(names):
+    designs = list(heat_exchangers_dict["Design"])
+    missing = [name for name in names if name not in designs]
+    if missing:
+        raise ValueError(f"No heat exchangers {missing} in the heat exchanger catalog")
+    rows = [designs.index(name) for name in names]
+    return {column: np.asarray(values)[rows] for column, values in heat_exchangers_dict.items()}
+
+#Solve a single design
+def evaluate(request):
+    values = settings(request)
+    hx = select_heat_exchangers([request["heat_exchanger"]])
+    index = pump_index_for(values["lifetime"], values["price"], values["rate"])
+    return solvers.solve_design(request["OD"], request["schedule"], request["material"], hx["Design"][0], hx["Cost"][0], hx["k"][0], values["sections"], values["min_pressure"], values["target"], values["lifetime"], False, values["method"], index)
+
+#Optimal designs out of a grid of pipes and heat exchangers for each objective, or for one objective if the request names it
+#The hydraulic table of each grid is built once, so that later requests for the grid only pick the pumps and add up the costs
+def best(request):
+    values = settings(request)
+    ODs = request.get("ODs", main.ODs)
+    schedules = request.get("schedules", main.schedules)
+    materials = request.get("materials", main.materials)
+    hx_dict = select_heat_exchangers(request["heat_exchangers"]) if "heat_exchangers" in request else heat_exchangers_dict
+
+    key = economics.table_key(ODs, schedules, materials, hx_dict, values["sections"], values["min_pressure"], pumps_dict, values["method"])
+    hit, table = tables.get(key)
+    if not hit:
+        table = economics.hydraulic_table(ODs, schedules, materials, hx_dict, values["sections"], values["min_pressure"], pumps_dict, values["method"])
+        tables.put(key, table)
+
+    results = economics.rank(table, values["target"], values["lifetime"], values["price"], values["rate"])
+    optimal = economics.optimal_designs(results)
+    objective = request.get("objective")
+    if objective is not None:
+        if objective not in sweep.objectives:
+            raise ValueError(f"Unknown objective: {objective}")
+        optimal = {objective: optimal.get(objective)}
+    return {"designs": len(results["reason"]), "feasible": int((results["reason"] == grid.FEASIBLE).sum()), "optimal": optimal}
+
+#Hits and sizes of the caches of the process answering the request
+def stats(request):
+    return {"pid": os.getpid(), "caches": cache.stats(), "indexes": len(indexes.entries), "tables": len(tables.entries)}
+
+#Operations a request can ask for
+operations = {
+    "ping": lambda request: "pong",
+    "evaluate": evaluate,
+    "best": best,
+    "stats": stats,
+}
+
+#Convert a result to values which JSON can hold, values which are not finite become null
+def plain(value):
+    if isinstance(value, dict):
+        return {str(key): plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [plain(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+#Answer a request, returning a response with the id of the request and either its result or the error it raised
+def answer(request):
+    try:
+        operation = operations.get(request.get("op"))
+        if operation is None:
+            raise ValueError(f"Unknown op: {request.get('op')}")
+        return {"id": request.get("id"), "ok": True, "result": plain(operation(request))}
+    except (ValueError, KeyError, TypeError, ArithmeticError) as error:
+        return {"id": request.get("id"), "ok": False, "error": f"{type(error).__name__}: {error}"}
+
+#Parse a line of JSON and answer it in the worker pool, returning the response as a line of JSON
+async def respond(line, executor):
+    try:
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError("request must be a JSON object")
+    except ValueError as error:
+        response = {"id": None, "ok": False, "error": f"Bad request: {error}"}
+    else:
+        response = await asyncio.get_running_loop().run_in_executor(executor, answer, request)
+    return json.dumps(response) + "\n"
+
+#Answer the requests of one stream of lines, several at once, writing each response as soon as it is ready
+#Responses can be written in a different order than the requests were read, the id of each request is copied to its response
+async def serve_lines(readline, write, executor):
+    pending = set()
+
+    async def handle(line):
+        write(await respond(line, executor))
+
+    while True:
+        line = await readline()
+        if not line:
+            break
+        if line.strip():
+            task = asyncio.create_task(handle(line))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.gather(*pending)
+
+#Answer requests read from stdin until it is closed, writing the responses to stdout
+async def serve_stdin(executor):
+    loop = asyncio.get_running_loop()
+
+    def write(text):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    await serve_lines(partial(loop.run_in_executor, None, sys.stdin.readline), write, executor)
+
+#Remove a socket left behind by a service which is no longer running, so that a new one can listen on the path
+#Raises FileExistsError if the path is anything other than a socket, or if a service is still listening on it
+def remove_stale_socket(path):
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} exists and is not a socket")
+    with socket.socket(socket.AF_UNIX) as client:
+        try:
+            client.connect(path)
+        except ConnectionRefusedError:
+            os.remove(path)
+            return
+    raise FileExistsError(f"A service is already listening on {path}")
+
+#Answer requests from every connection to a Unix socket until the service is stopped, then remove the socket
+#Only the socket this service created is removed, in case the path has been replaced since
+async def serve_socket(path, executor):
+
+    async def connection(reader, writer):
+        try:
+            await serve_lines(reader.readline, lambda text: writer.write(text.encode()), executor)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    remove_stale_socket(path)
+    server = await asyncio.start_unix_server(connection, path)
+    created = os.stat(path)
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        try:
+            current = os.stat(path)
+        except FileNotFoundError:
+            current = None
+        if current is not None and stat.S_ISSOCK(current.st_mode) and (current.st_dev, current.st_ino) == (created.st_dev, created.st_ino):
+            os.remove(path)
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Answer design evaluations and best design queries as JSON lines, keeping the catalogs and hydraulic results warm")
+    parser.add_argument("--socket", help="Unix socket to listen on instead of reading requests from stdin")
+    parser.add_argument("--workers", type=int, default=1, help="number of processes answering requests, requests are answered in this process when 1")
+    parser.add_argument("--cache", default=main.cache_file, help="file of hydraulic results saved by main.py to load")
+    parser.add_argument("--cold", action="store_true", help="do not build the hydraulic table of the grid in main.py before answering requests")
+    args = parser.parse_args()
+
+    #Check the socket before warming up, so that a bad path fails straight away
+    if args.socket is not None:
+        try:
+            remove_stale_socket(args.socket)
+        except FileExistsError as error:
+            parser.error(str(error))
+
+    initargs = (main.pumps_file, main.pipes_file, main.heat_exchangers_file, args.cache, not args.cold, main.route_file)
+    if args.workers <= 1:
+        load(*initargs)
+        executor = ThreadPoolExecutor(max_workers=1)
+    else:
+        executor = ProcessPoolExecutor(max_workers=args.workers, initializer=load, initargs=initargs)
+
+    try:
+        with executor:
+            asyncio.run(serve_socket(args.socket, executor) if args.socket is not None else serve_stdin(executor))
+    except (KeyboardInterrupt, BrokenPipeError, asyncio.CancelledError):
+        pass
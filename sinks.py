@@ -0,0 +1,180 @@
+import csv
+import json
+import os
+import numpy as np
+
+#Size of the write buffer of every sink, in bytes
+buffer_size = 1 << 20
+
+#Number of designs the numpy sink holds in memory before writing them out
+block_size = 4096
+
+#Smallest width in characters of each text field of the numpy sink
+default_widths = {"material": 16, "heat_exchanger": 32, "section_pump": 16}
+
+#Flatten a design into a single record of its identity, feasibility, sections, and totals
+def design_record(design, n_sections):
+
+    record = {
+        "OD": design["OD"],
+        "schedule": design["schedule"],
+        "material": design["material"],
+        "heat_exchanger": design["heat_exchanger"],
+        "reason": design["reason"],
+        "excess_pressure": design.get("excess_pressure"),
+        "total_length": design.get("total_length"),
+        "total_capital_cost": design.get("total_capital_cost"),
+        "total_operating_cost": design.get("total_operating_cost"),
+        "lifetime": design["lifetime"],
+        "total_lifetime_cost": design.get("total_lifetime_cost"),
+        "total_power": design.get("total_power"),
+    }
+
+    sections = design.get("sections") or [(None, None, None)] * n_sections
+    for i, (length, pump_id, rpm) in enumerate(sections):
+        record[f"section{i + 1}_length"] = length
+        record[f"section{i + 1}_pump"] = pump_id
+        record[f"section{i + 1}_rpm"] = rpm
+
+    #Convert numpy scalars so that every sink sees plain python values
+    return {key: value.item() if isinstance(value, np.generic) else value for key, value in record.items()}
+
+#Widths of the text fields of the numpy sink, wide enough for the longest material, heat exchanger, and pump ID of the catalogs in use
+def string_widths(materials, heat_exchangers, pump_ids):
+    longest = {"material": materials, "heat_exchanger": heat_exchangers, "section_pump": pump_ids}
+    return {field: max([width] + [len(str(value)) for value in longest[field]]) for field, width in default_widths.items()}
+
+#Open a sink by its format name, widths are the widths of the text fields of the numpy sink (see string_widths)
+def open_sink(format, path, n_sections, widths=None):
+    if format == "text": return TextSink(path)
+    if format == "csv": return CSVSink(path, n_sections)
+    if format == "jsonl": return JSONLSink(path, n_sections)
+    if format == "npy": return NumpySink(path, n_sections, widths)
+    raise ValueError(f"Unknown result format: {format}")
+
+#Human readable report of every design, the same format as results.txt
+class TextSink:
+
+    def __init__(self, path):
+        self.file = open(path, "w", buffering=buffer_size)
+
+    def write(self, design):
+
+        lines = ["----------------------------------------------------------------------------------------------\n"]
+        lines.append(f"Using OD of {design['OD']} inch schedule {design['schedule']} {design['material']} pipe with {design['heat_exchanger']} heat exchanger\n")
+
+        if design["reason"] == "pressure":
+            lines.append(f"Design unsuccessful. Maximum pressure of system exceeds maximum pressure of pipe by {design['excess_pressure']}m of head")
+
+        elif design["reason"] == "diverged":
+            lines.append(f"Design unsuccessful. Numerical analysis of slant required to overcome head loss due to friction diverges")
+
+        elif design["reason"] == "pump":
+            lines.append(f"Design unsuccessful. Head required by pump exceeds that of pumps available at the given flow rate")
+
+        else:
+            lines.append(f"Total length of pipe: {design['total_length']}m\n")
+            lines.append(f"Total capital cost: ${design['total_capital_cost']}\n")
+            lines.append(f"Total operating cost: ${design['total_operating_cost']}/hr\n")
+            lines.append(f"Total lifetime cost over {design['lifetime']} years: ${design['total_lifetime_cost']}\n")
+            lines.append(f"Total power consumption: {design['total_power']}kW\n")
+            for i, (length, pump_id, rpm) in enumerate(design["sections"]):
+                lines.append(f"Section {i + 1} uses {length}m of pipe with the {pump_id} {rpm}RPM pump\n")
+
+        lines.append("\n\n\n")
+        self.file.write("".join(lines))
+
+    def close(self):
+        self.file.close()
+
+#One row per design, with one column for each field of the design record
+class CSVSink:
+
+    def __init__(self, path, n_sections):
+        self.n_sections = n_sections
+        self.file = open(path, "w", newline="", buffering=buffer_size)
+        self.writer = None
+
+    def write(self, design):
+        record = design_record(design, self.n_sections)
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=list(record))
+            self.writer.writeheader()
+        self.writer.writerow(record)
+
+    def close(self):
+        self.file.close()
+
+#One JSON object per line for each design
+class JSONLSink:
+
+    def __init__(self, path, n_sections):
+        self.n_sections = n_sections
+        self.file = open(path, "w", buffering=buffer_size)
+
+    def write(self, design):
+        self.file.write(json.dumps(design_record(design, self.n_sections)) + "\n")
+
+    def close(self):
+        self.file.close()
+
+#Structured numpy array of every design saved as a .npy file, which can be opened with np.load(path, mmap_mode="r")
+#Blocks of designs are streamed to a raw file as they arrive, and copied into the .npy file once the number of designs is known
+#numpy cuts off text which is longer than its field, so a design with a longer material, heat exchanger, or pump ID raises ValueError
+class NumpySink:
+
+    def __init__(self, path, n_sections, widths=None):
+        self.path = path
+        self.n_sections = n_sections
+        self.widths = dict(default_widths, **(widths or {}))
+        self.dtype = np.dtype([
+            ("OD", "f8"), ("schedule", "i8"), ("material", f"U{self.widths['material']}"), ("heat_exchanger", f"U{self.widths['heat_exchanger']}"), ("reason", "U16"),
+            ("excess_pressure", "f8"), ("total_length", "f8"), ("total_capital_cost", "f8"), ("total_operating_cost", "f8"),
+            ("lifetime", "f8"), ("total_lifetime_cost", "f8"), ("total_power", "f8"),
+            ("section_length", "f8", (n_sections,)), ("section_pump", f"U{self.widths['section_pump']}", (n_sections,)), ("section_rpm", "i8", (n_sections,)),
+        ])
+        self.raw_path = path + ".part"
+        self.raw = open(self.raw_path, "wb", buffering=buffer_size)
+        self.block = []
+        self.count = 0
+
+    def write(self, design):
+        record = design_record(design, self.n_sections)
+        sections = range(1, self.n_sections + 1)
+        self.check_width("material", record["material"])
+        self.check_width("heat_exchanger", record["heat_exchanger"])
+        for i in sections:
+            self.check_width("section_pump", record[f"section{i}_pump"])
+        self.block.append((
+            record["OD"], record["schedule"], record["material"], record["heat_exchanger"], record["reason"] or "",
+            nan(record["excess_pressure"]), nan(record["total_length"]), nan(record["total_capital_cost"]), nan(record["total_operating_cost"]),
+            record["lifetime"], nan(record["total_lifetime_cost"]), nan(record["total_power"]),
+            [nan(record[f"section{i}_length"]) for i in sections], [record[f"section{i}_pump"] or "" for i in sections], [record[f"section{i}_rpm"] or 0 for i in sections],
+        ))
+        if len(self.block) >= block_size:
+            self.flush()
+
+    def check_width(self, field, value):
+        if value is not None and len(str(value)) > self.widths[field]:
+            raise ValueError(f"{value!r} is longer than the {self.widths[field]} characters of the {field} field of {self.path}")
+
+    def flush(self):
+        if self.block:
+            np.array(self.block, dtype=self.dtype).tofile(self.raw)
+            self.count += len(self.block)
+            self.block = []
+
+    def close(self):
+        self.flush()
+        self.raw.close()
+
+        array = np.lib.format.open_memmap(self.path, mode="w+", dtype=self.dtype, shape=(self.count,))
+        for start in range(0, self.count, block_size):
+            array[start:start + block_size] = np.fromfile(self.raw_path, dtype=self.dtype, count=min(block_size, self.count - start), offset=start * self.dtype.itemsize)
+        array.flush()
+        del array
+        os.remove(self.raw_path)
+
+#Missing values are stored as nan in numeric columns
+def nan(value):
+    return np.nan if value is None else value
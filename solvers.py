@@ -1,18 +1,48 @@
+import math
+import hashlib
 import equations
-import pandas
-import pumps
-import pandas as pd
+import pump_index
+import cache
+import instrument
+import pipes
+import numpy as np
 
 #Error threshold for numerical analysis
 error_threshold = 0.001
 
+#Maximum number of iterations before the slant of section 0 is considered to diverge
+max_iterations = 10000
+
+#Raised when the slant of section 0 cannot overcome the head loss due to friction
+class DivergenceError(ArithmeticError):
+    pass
+
 #Minimum distance of pipe underground
 x = 5
 
-def solve_section(diameter, roughness, k, p0, p2, z0, z2, adjacent, target, lifetime, debug):
+#Catalog of pipe schedules and materials, and the row of each combination of schedule and material in it
+pipes_dict = pipes.pipes_dict
+pipe_rows = {}
+
+#Use a pipe catalog for every following call to pipe_properties
+def set_pipe_catalog(catalog):
+    global pipes_dict, pipe_rows
+    pipes_dict = catalog
+    pipe_rows = {(schedule, material): row for row, (schedule, material) in enumerate(zip(catalog["schedule"], catalog["material"]))}
+    cache.caches["pipe_properties"].clear()
+
+#Hash of the pipe catalog in use and the constants of the solvers and equations, which every cached hydraulic result depends on
+#Results saved to a cache file are only loaded again by a run with the same key
+def hydraulics_key():
+    catalog = [np.asarray(pipes_dict[name]).tolist() for name in sorted(pipes_dict)]
+    constants = [np.asarray(value).tolist() for value in [equations.density, equations.gravity, equations.viscosity, equations.flow, x, error_threshold, max_iterations]]
+    return hashlib.sha256(repr((catalog, constants)).encode()).hexdigest()
+
+@instrument.timed("solve_section")
+def solve_section(diameter, roughness, k, p0, p2, z0, z2, adjacent, target, lifetime, debug, method="substitution", index=None):
 
     #Calculate length of the first section with numerical methods (diameter, roughness, k, z0, adj, debug)
-    length0, y = solve_section0(diameter, roughness, p0, z0, adjacent, debug)
+    length0, y = solve_section0(diameter, roughness, p0, z0, adjacent, debug, method)
 
     #Calculate length of the second section and the minimum required pump head (diameter, roughness, p2, y, z2, debug)
     length1, pump_head = solve_section1(diameter, roughness, p2, y, z2, debug)
@@ -20,41 +50,21 @@ def solve_section(diameter, roughness, k, p0, p2, z0, z2, adjacent, target, life
     #Find total length
     total_length = length0 + length1
 
-    #Grab pumps dict into a pandas dataframe
-    pumps_dataframe = pd.DataFrame.from_dict(pumps.pumps_dict)
-    #Limit the dataframe to pumps which have head above the minimum required head
-    pumps_dataframe = pumps_dataframe.loc[pumps_dataframe["head"] >= pump_head]
+    #Find the best pump with at least the minimum required head from the index of the pump catalog
+    if index is None: index = pump_index.default_index(lifetime)
+    pump = pump_index.select_pump(index, pump_head, target)
 
-    #Loop across each viable pump, find minimum cost and power
     pump_capital_cost = None
     pump_operating_cost = None
     pump_total_cost = None
     pump_power = None
     selected_pump = 0
-    for pump in pumps_dataframe.iterrows():
-
-        capital_cost = pump[1][2] #Capital cost of purchasing pump in $
-        power = pump_head * equations.density * equations.gravity * equations.flow #Hydraulic power required of pump in watts
-        power = (power / pump[1][3]) / 1000 #Electrical power required of pump, in kilowatts (taking into account the efficiency)
-        operating_cost = power * 3600 * 0.16 #Operating cost in $/hr
-        total_operating_cost = operating_cost * 24 * 365 * lifetime #Operating cost over lifetime
-        total_cost = capital_cost + total_operating_cost
-
-        if target == "cost":
-            if pump_total_cost is None or total_cost < pump_total_cost:
-                pump_total_cost = total_cost
-                pump_capital_cost = capital_cost
-                pump_operating_cost = operating_cost
-                pump_power = power
-                selected_pump = pump[1]
-
-        elif target == "power":
-            if pump_power is None or power < pump_power:
-                pump_total_cost = total_cost
-                pump_capital_cost = capital_cost
-                pump_operating_cost = operating_cost
-                pump_power = power
-                selected_pump = pump[1]
+    if pump >= 0:
+        pumps_dict = index["pumps_dict"]
+        pump_capital_cost = index["cost"][pump] #Capital cost of purchasing pump in $
+        pump_power = pump_index.pump_power(pump_head, index["efficiency"][pump]) #Electrical power required of pump, in kilowatts
+        pump_operating_cost, pump_total_cost = pump_index.pump_costs(pump_capital_cost, pump_power, lifetime, index["price"], index["rate"]) #Operating cost in $/hr and lifetime cost
+        selected_pump = (pumps_dict["ID"][pump], pumps_dict["RPM"][pump], pumps_dict["cost"][pump], pumps_dict["efficiency"][pump], pumps_dict["head"][pump])
     
     if(debug): print("Selected pump: ", selected_pump)
     if(debug): print("Capital cost: ", pump_capital_cost, "$")
@@ -65,7 +75,23 @@ def solve_section(diameter, roughness, k, p0, p2, z0, z2, adjacent, target, life
     return total_length, pump_capital_cost, pump_operating_cost, pump_total_cost, pump_power, selected_pump
 
 #Use equation 0 to solve for the length of section 0
-def solve_section0(diameter, roughness, p0, z0, adj, debug):
+#Raises DivergenceError if the slant required to overcome head loss does not converge
+@cache.memoize("solve_section0")
+@instrument.timed("solve_section0")
+def solve_section0(diameter, roughness, p0, z0, adj, debug, method="substitution"):
+
+    #Accelerated methods are solved as a batch of one design
+    if method != "substitution":
+        length, y, diverged, iter = solve_section0_batch([diameter], [roughness], [p0], z0, adj, method)
+        length, y, diverged, iter = length[0], y[0], diverged[0], iter[0]
+        if diverged: raise DivergenceError(f"Slant of section 0 diverges after {iter} iterations")
+        if(debug): print("Length of Section 0: ", length)
+        if(debug): print("y: ", y)
+        if(debug): print("Iterations: ", iter)
+        return length, y
+
+    #Iterate on python floats, which raise OverflowError rather than warning when the slant diverges
+    diameter, roughness, p0, z0, adj = float(diameter), float(roughness), float(p0), float(z0), float(adj)
 
     #Initial guess for y0 and initial error
     y = 0
@@ -74,18 +100,31 @@ def solve_section0(diameter, roughness, p0, z0, adj, debug):
     error = 100
     iter = 0
 
-    while abs(error) > error_threshold:
-        #Calcluation of length
-        length = (z0 - (60 - x)) + (adj ** 2 + y ** 2) ** 0.5
-
-        #Realculation of y (with equation 1)
-        hloss = equations.hloss(length, diameter, roughness)
-        y = 62 - z0 - x - p0 + hloss
-
-        #Error calculation:
-        error = y - last_guess
-        last_guess = y
-        iter = iter + 1
+    #Count the iterations however the loop ends, this only runs when the result is not already cached
+    try:
+        while abs(error) > error_threshold:
+            if iter >= max_iterations:
+                raise DivergenceError(f"Slant of section 0 does not converge within {max_iterations} iterations")
+
+            try:
+                #Calcluation of length
+                length = (z0 - (60 - x)) + (adj ** 2 + y ** 2) ** 0.5
+
+                #Realculation of y (with equation 1)
+                hloss = equations.hloss(length, diameter, roughness)
+                y = 62 - z0 - x - p0 + hloss
+            except OverflowError:
+                raise DivergenceError(f"Slant of section 0 overflows after {iter} iterations")
+            if not math.isfinite(y):
+                raise DivergenceError(f"Slant of section 0 overflows after {iter} iterations")
+
+            #Error calculation:
+            error = y - last_guess
+            last_guess = y
+            iter = iter + 1
+    finally:
+        instrument.count("section0_iterations", iter)
+        instrument.record("section0_iterations_per_solve", iter)
 
     #Restrict y to > 0
     if(y < 0): y = 0
@@ -99,12 +138,149 @@ def solve_section0(diameter, roughness, p0, z0, adj, debug):
 
     return length, y
 
+#Use equation 0 to solve for the length of section 0 for arrays of designs at once
+#The method is either "substitution" (the same iteration as solve_section0) or "secant" (safeguarded secant / false position)
+#z0 and adj may also be arrays, so that the sections of a route are solved together with the designs, and so may the physical
+#properties given (see equations.py), so that sampled scenarios are solved together with the designs
+#Returns the lengths, y values, a mask of the designs which diverged, and the number of iterations used by each design
+@instrument.timed("solve_section0_batch")
+def solve_section0_batch(diameter, roughness, p0, z0, adj, method="substitution", max_iterations=max_iterations, properties=None):
+
+    #The iterations work on flat arrays, the results are given the broadcast shape of the inputs
+    #Properties which are arrays are flattened along with the designs, the others are the same for every design
+    properties = dict(properties) if properties is not None else {}
+    arrays = [name for name, value in properties.items() if np.ndim(value) > 0]
+    values = np.broadcast_arrays(*[np.asarray(value, dtype=float) for value in [diameter, roughness, p0, z0, adj, *[properties[name] for name in arrays]]])
+    shape = values[0].shape
+    diameter, roughness, p0, z0, adj, *values = [value.ravel() for value in values]
+    properties.update(zip(arrays, values))
+
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        if method == "substitution":
+            y, diverged, iterations = substitute_section0(diameter, roughness, p0, z0, adj, max_iterations, properties)
+        elif method == "secant":
+            y, diverged, iterations = secant_section0(diameter, roughness, p0, z0, adj, max_iterations, properties)
+        else:
+            raise ValueError(f"Unknown method for section 0: {method}")
+
+        #Restrict y to > 0
+        y = np.where(diverged, np.nan, np.maximum(y, 0))
+        if instrument.enabled:
+            instrument.count("section0_iterations", int(iterations.sum()))
+            instrument.record("section0_iterations_per_solve", iterations)
+
+        #Final calcluation of length
+        length = (z0 - (60 - x)) + (adj ** 2 + y ** 2) ** 0.5
+
+    return length.reshape(shape), y.reshape(shape), diverged.reshape(shape), iterations.reshape(shape)
+
+#Recalculate y with equation 1 from a guess of y, this is the fixed point map of section 0
+#Physical properties which differ for each design are given as arrays which line up with the designs
+def slant(y, diameter, roughness, p0, z0, adj, properties=None):
+    length = (z0 - (60 - x)) + (adj ** 2 + y ** 2) ** 0.5
+    hloss = equations.hloss(length, diameter, roughness, properties)
+    return 62 - z0 - x - p0 + hloss
+
+#Physical properties of the designs in the mask, properties which are the same for every design are kept as they are
+def subset(properties, mask):
+    return {name: value[mask] if np.ndim(value) > 0 else value for name, value in properties.items()}
+
+#Successive substitution on y for every design, only designs which are still active are iterated on
+def substitute_section0(diameter, roughness, p0, z0, adj, max_iterations, properties=None):
+
+    if properties is None: properties = {}
+    y = np.zeros(diameter.shape)
+    diverged = np.zeros(diameter.shape, dtype=bool)
+    iterations = np.zeros(diameter.shape, dtype=int)
+    active = np.ones(diameter.shape, dtype=bool)
+
+    while active.any():
+        last_guess = y[active]
+        y[active] = slant(last_guess, diameter[active], roughness[active], p0[active], z0[active], adj[active], subset(properties, active))
+        iterations[active] += 1
+
+        #Designs leave the active set once converged, once y is no longer finite, or once they run out of iterations
+        converged = np.abs(y[active] - last_guess) <= error_threshold
+        diverged[active] = ~np.isfinite(y[active]) | (~converged & (iterations[active] >= max_iterations))
+        active[active] = ~converged & ~diverged[active]
+
+    return y, diverged, iterations
+
+#Solve for the root of r(y) = slant(y) - y with the secant method, started from the left of the root
+#r is convex for the pipe catalogs in use, so secant steps from two points left of the root never pass it and the
+#residual must be decreasing for a root to exist ahead. If a step does pass the root it becomes the upper end of a
+#bracket, and the remaining steps use false position (Illinois) inside that bracket.
+def secant_section0(diameter, roughness, p0, z0, adj, max_iterations, properties=None):
+
+    if properties is None: properties = {}
+    shape = diameter.shape
+    iterations = np.ones(shape, dtype=int)
+
+    #Residual at y = 0, designs which need no slant are solved immediately
+    previous = np.zeros(shape)
+    previous_residual = slant(previous, diameter, roughness, p0, z0, adj, properties)
+    y = np.maximum(previous_residual, 0)
+    diverged = ~np.isfinite(previous_residual)
+    active = (previous_residual > error_threshold) & ~diverged
+
+    #Second point is a substitution step, which cannot pass the root
+    lower = y.copy()
+    lower_residual = np.zeros(shape)
+    lower_residual[active] = slant(lower[active], diameter[active], roughness[active], p0[active], z0[active], adj[active], subset(properties, active)) - lower[active]
+    iterations[active] += 1
+    upper = np.full(shape, np.inf)
+    upper_residual = np.full(shape, -np.inf)
+    retained = np.zeros(shape, dtype=int)
+
+    while active.any():
+        i = np.flatnonzero(active)
+        a, r_a = previous[i], previous_residual[i]
+        b, r_b = lower[i], lower_residual[i]
+        c, r_c = upper[i], upper_residual[i]
+        bracketed = np.isfinite(c)
+
+        #Without a bracket the residual has to be decreasing for there to be a root ahead
+        stalled = ~bracketed & ~(r_b < r_a)
+
+        #Secant step through the two lower points, or false position across the bracket
+        p = np.where(bracketed, b - r_b * (c - b) / (r_c - r_b), b - r_b * (b - a) / (r_b - r_a))
+
+        #Safeguard the step: bisect when it leaves the bracket, substitute when it does not move forward
+        p = np.where(bracketed & ~((p > b) & (p < c)), (b + c) / 2, p)
+        p = np.where(~bracketed & ~(p > b), b + r_b, p)
+
+        r_p = slant(p, diameter[i], roughness[i], p0[i], z0[i], adj[i], subset(properties, i)) - p
+        iterations[i] += 1
+        y[i] = p
+
+        #A positive residual moves the lower point up, a negative one moves the upper end of the bracket down
+        below = r_p > 0
+        previous[i] = np.where(below, b, a)
+        previous_residual[i] = np.where(below, r_b, r_a)
+        lower[i] = np.where(below, p, b)
+        upper[i] = np.where(below, c, p)
+
+        #Illinois modification, halve the residual of an end of the bracket which is kept twice in a row
+        side = np.where(below, 1, -1)
+        lower_residual[i] = np.where(below, r_p, np.where(bracketed & (retained[i] == -1), r_b / 2, r_b))
+        upper_residual[i] = np.where(below, np.where(bracketed & (retained[i] == 1), r_c / 2, r_c), r_p)
+        retained[i] = side
+
+        #Error calculation, converged once the step or the bracket is under the error threshold
+        converged = (np.abs(p - b) <= error_threshold) | (upper[i] - lower[i] <= error_threshold) | (r_p == 0)
+        diverged[i] = stalled | ~np.isfinite(r_p) | (~converged & (iterations[i] >= max_iterations))
+        active[i] = ~converged & ~diverged[i]
+
+    return y, diverged, iterations
+
 #Use equation 1 to solve section 2
-def solve_section1(diameter, roughness, p2, y, z2, debug):
+@cache.memoize("solve_section1")
+@instrument.timed("solve_section1")
+def solve_section1(diameter, roughness, p2, y, z2, debug, properties=None):
 
     #Calcluate the length, head loss, and minimum required pump head of the section
     length = z2 - (60 - x - y)
-    hloss = equations.hloss(length, diameter, roughness)
+    hloss = equations.hloss(length, diameter, roughness, properties)
     pump_head = z2 - 62 + p2 + hloss + x + y
 
     if(debug): print("Length of Section 1: ", length)
@@ -114,40 +290,27 @@ def solve_section1(diameter, roughness, p2, y, z2, debug):
     return length, pump_head
 
 #Find properties of a given combination of pump
+@cache.memoize("pipe_properties")
+@instrument.timed("pipe_properties")
 def pipe_properties(OD, schedule, material):
 
-    #Declare properly scoped variables
-    pipe_cost = None
-    wall_thickness = None
-    max_pressure = None
-    roughness = None
-
-    if schedule == 40:
-        wall_thickness = 0.021 * OD + 0.112
-        max_pressure = 154.71 #Maximum pressure in m of head, obtained from online calculator https://www.convertunits.com/from/PSI/to/meter+of+head
-
-        if material == "Steel":
-            pipe_cost = 10 * OD + 30
-            roughness = 0.1 / 1000
+    #Find the schedule and material in the pipe catalog
+    row = pipe_rows.get((schedule, material))
+    if row is None:
+        raise ValueError(f"No schedule {schedule} {material} pipe in the pipe catalog")
 
-        elif material == "PVC":
-            pipe_cost = 5 * OD + 40
-            roughness = 0.001 / 1000
-
-    elif schedule == 80:
-        wall_thickness = 0.039 * OD + 0.14
-        max_pressure = 225.04 #Maximum pressure in m of head, obtained from online calculator https://www.convertunits.com/from/PSI/to/meter+of+head
-
-        if material == "Steel":
-            pipe_cost = 15 * OD + 60
-            roughness = 0.1 / 1000
-
-        elif material == "PVC":
-            pipe_cost = 10 * OD + 80
-            roughness = 0.001 / 1000
+    #Wall thickness and pipe cost are linear in OD
+    #Maximum pressure in m of head, obtained from online calculator https://www.convertunits.com/from/PSI/to/meter+of+head
+    wall_thickness = pipes_dict["wall_slope"][row] * OD + pipes_dict["wall_intercept"][row]
+    max_pressure = pipes_dict["max_pressure"][row]
+    pipe_cost = pipes_dict["cost_slope"][row] * OD + pipes_dict["cost_intercept"][row]
+    roughness = pipes_dict["roughness"][row]
 
     #Trenching and remediation
-    if OD <= 2:
+    if isinstance(OD, np.ndarray):
+        pipe_cost = pipe_cost + np.where(OD <= 2, 35, 50)
+
+    elif OD <= 2:
         pipe_cost += 35
 
     elif OD > 2:
@@ -155,4 +318,52 @@ def pipe_properties(OD, schedule, material):
 
     diameter = (OD - (2 * wall_thickness)) * 0.0254 #Inner diameter in metres
 
-    return diameter, roughness, pipe_cost, max_pressure
\ No newline at end of file
+    return diameter, roughness, pipe_cost, max_pressure
+
+#Solve every section of a single design, returning a dictionary describing the design
+#A design which is not feasible has its reason set to "pressure", "diverged", or "pump"
+@instrument.timed("solve_design")
+def solve_design(OD, schedule, material, hx_name, hx_cost, k, sections, min_pressure, target, lifetime, debug, method="substitution", index=None):
+
+    design = {"OD": OD, "schedule": schedule, "material": material, "heat_exchanger": hx_name, "lifetime": lifetime, "reason": None}
+
+    #Based on pipe properties, find the max pressure, wall thickness, cost/m, and roughness
+    diameter, roughness, pipe_cost, max_pressure = pipe_properties(OD, schedule, material)
+
+    #Calculating pressures (in head) before and after heat exchanger, and check if p2 is over max pressure
+    p0, p2 = equations.pressures(diameter, k, min_pressure)
+    if p2 > max_pressure:
+        design["reason"] = "pressure"
+        design["excess_pressure"] = p2 - max_pressure
+        return design
+
+    #Solve each section, the design is not feasible if the slant diverges
+    try:
+        solved = [solve_section(diameter, roughness, k, p0, p2, z0, z2, adjacent, target, lifetime, debug, method, index) for z0, z2, adjacent in sections]
+    except DivergenceError:
+        design["reason"] = "diverged"
+        return design
+
+    #The design is not feasible if any section has no pump with enough head
+    if any(section[1] is None for section in solved):
+        design["reason"] = "pump"
+        return design
+
+    #Find total capital cost, operating cost, and power
+    total_length = sum(section[0] for section in solved)
+    total_pipe_cost = pipe_cost * total_length
+    total_capital_cost = total_pipe_cost + sum(section[1] for section in solved) + hx_cost
+    total_operating_cost = sum(section[2] for section in solved)
+    total_lifetime_cost = sum(section[3] for section in solved) + total_pipe_cost + hx_cost
+    total_power = sum(section[4] for section in solved)
+
+    design["total_length"] = total_length
+    design["total_capital_cost"] = total_capital_cost
+    design["total_operating_cost"] = total_operating_cost
+    design["total_lifetime_cost"] = total_lifetime_cost
+    design["total_power"] = total_power
+    design["sections"] = [(section[0], section[5][0], section[5][1]) for section in solved]
+
+    return design
+
+set_pipe_catalog(pipes.pipes_dict)
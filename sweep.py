@@ -0,0 +1,92 @@
+import solvers
+import cache
+import instrument
+import math
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+#Keys of the objectives that optimal designs are kept for
+objectives = ["total_capital_cost", "total_operating_cost", "total_lifetime_cost", "total_power"]
+
+#List every combination of pipe and heat exchanger, in the same order as the nested loops of the sweep
+def design_space(ODs, schedules, materials, heat_exchangers_dict):
+
+    space = []
+    for OD in ODs:
+        for schedule in schedules:
+            for material in materials:
+                for hx_name, hx_cost, k in zip(heat_exchangers_dict["Design"], heat_exchangers_dict["Cost"], heat_exchangers_dict["k"]):
+                    space.append((OD, schedule, material, hx_name, hx_cost, k))
+
+    return space
+
+#Save a design as optimal for a single objective if it improves on it, an earlier design is kept when two are equal
+def update_optimal_key(optimal, key, design):
+    if optimal.get(key) is None or design[key] < optimal[key][key]:
+        optimal[key] = design
+
+#Save a feasible design as optimal for each objective it improves on
+def update_optimal(optimal, design):
+    if design["reason"] is None:
+        for key in objectives:
+            update_optimal_key(optimal, key, design)
+
+#Merge the optimal designs of a later chunk into those of the earlier chunks
+def merge_optimal(optimal, chunk_optimal):
+    for key in objectives:
+        if chunk_optimal.get(key) is not None:
+            update_optimal_key(optimal, key, chunk_optimal[key])
+
+#Find the optimal designs out of a list of designs
+def optimal_designs(designs):
+    optimal = {}
+    for design in designs:
+        update_optimal(optimal, design)
+    return optimal
+
+#Solve a chunk of the design space, returning every design in order along with the optimal designs of the chunk
+def solve_chunk(chunk, sections, min_pressure, target, lifetime, method, index=None):
+    designs = [solvers.solve_design(OD, schedule, material, hx_name, hx_cost, k, sections, min_pressure, target, lifetime, False, method, index) for OD, schedule, material, hx_name, hx_cost, k in chunk]
+    return designs, optimal_designs(designs)
+
+#Set up a worker process with the pipe catalog and cached results of this process
+def start_worker(pipes_dict, saved):
+    solvers.set_pipe_catalog(pipes_dict)
+    cache.merge(saved)
+
+#Solve a chunk in a worker process, returning the result along with the results it added to the caches
+def solve_cached(solve, chunk):
+    before = cache.keys()
+    result = solve(chunk)
+    return result, cache.added(before)
+
+#Solve the design space in chunks, yielding the designs and optimal designs of each chunk in order
+#With more than one worker the chunks are solved in a process pool, the results are the same whatever the number of workers
+#When instrumentation is enabled, each worker records its own chunks and what it recorded is merged back into this process
+#Workers are given the pipe catalog in use, since a worker which is started fresh rather than forked only has the built in catalog
+#With share_cache, workers also start with the cached results of this process and the results they add are merged back into it,
+#so that the caches can be saved for later runs
+def sweep(space, sections, min_pressure, target, lifetime, method="substitution", workers=1, chunk_size=None, index=None, share_cache=False):
+
+    if chunk_size is None: chunk_size = max(1, math.ceil(len(space) / (workers * 4)))
+    chunks = [space[i:i + chunk_size] for i in range(0, len(space), chunk_size)]
+    solve = partial(solve_chunk, sections=sections, min_pressure=min_pressure, target=target, lifetime=lifetime, method=method, index=index)
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield solve(chunk)
+
+    else:
+        instrumented = instrument.enabled
+        if share_cache: solve = partial(solve_cached, solve)
+        if instrumented: solve = partial(instrument.collect, solve)
+        saved = cache.entries() if share_cache else {}
+        with ProcessPoolExecutor(max_workers=workers, initializer=start_worker, initargs=(solvers.pipes_dict, saved)) as executor:
+            for result in executor.map(solve, chunks):
+                if instrumented:
+                    result, recorded = result
+                    instrument.merge(recorded)
+                if share_cache:
+                    result, added = result
+                    cache.merge(added)
+                yield result
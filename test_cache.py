@@ -0,0 +1,92 @@
+import pickle
+import numpy as np
+import pytest
+import main
+import heat_exchangers
+import pipes
+import solvers
+import sweep
+import cache
+
+#Every test starts and ends with empty caches, so that they do not see each other's results
+@pytest.fixture(autouse=True)
+def empty():
+    cache.clear()
+    yield
+    cache.clear()
+
+def test_lru():
+    lru = cache.LRUCache(2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == (True, 1)
+    lru.put("c", 3)
+    assert lru.get("b") == (False, None)
+    assert list(lru.entries) == ["a", "c"]
+    assert (lru.hits, lru.misses) == (1, 1)
+
+def test_memoize():
+    calls = []
+
+    @cache.memoize("test_memoize")
+    def function(value):
+        calls.append(value)
+        if value == 0:
+            raise ZeroDivisionError("zero")
+        return value * 2
+
+    assert function(2) == function(2) == 4
+    for i in range(2):
+        with pytest.raises(ZeroDivisionError):
+            function(0)
+    assert function([1]) == function([1]) == [1, 1]
+    assert len(calls) == 4
+    del cache.caches["test_memoize"]
+
+#Results saved by a run are loaded by a run with the same key, and a file saved with another key is discarded
+def test_save_load(tmp_path):
+    path = str(tmp_path / "hydraulics.cache")
+    solvers.pipe_properties(4, 40, "PVC")
+    key = solvers.hydraulics_key()
+    cache.save(path, key)
+    saved = cache.entries()
+
+    cache.clear()
+    assert cache.load(path, key)
+    assert cache.entries() == saved
+
+    cache.clear()
+    assert not cache.load(path, "other")
+    assert cache.stats()["pipe_properties"]["size"] == 0
+
+    with open(path, "wb") as file:
+        pickle.dump(saved, file)
+    assert not cache.load(path, key)
+    assert cache.load(str(tmp_path / "missing.cache"), key)
+
+#The key changes with the pipe catalog and the constants the cached results depend on
+def test_hydraulics_key(monkeypatch):
+    key = solvers.hydraulics_key()
+    catalog = {name: np.asarray(values) for name, values in pipes.pipes_dict.items()}
+    catalog["cost_slope"] = catalog["cost_slope"] * 2
+    solvers.set_pipe_catalog(catalog)
+    try:
+        assert solvers.hydraulics_key() != key
+    finally:
+        solvers.set_pipe_catalog(pipes.pipes_dict)
+    assert solvers.hydraulics_key() == key
+
+    monkeypatch.setattr(solvers, "max_iterations", solvers.max_iterations + 1)
+    assert solvers.hydraulics_key() != key
+
+#With share_cache, the results the workers add are merged back into the caches of this process
+def test_share_cache(scalar):
+    space = sweep.design_space(main.ODs, main.schedules, main.materials, heat_exchangers.heat_exchangers_dict)
+    sizes = {}
+    for workers in [2, 1]:
+        cache.clear()
+        for chunk in sweep.sweep(space, main.sections, main.min_pressure, scalar["target"], main.lifetime, index=scalar["index"], workers=workers, share_cache=True):
+            pass
+        sizes[workers] = {name: stats["size"] for name, stats in cache.stats().items()}
+    assert sizes[2] == sizes[1]
+    assert sizes[1]["solve_section0"] > 0
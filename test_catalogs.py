@@ -0,0 +1,103 @@
+import csv
+import re
+import pathlib
+import numpy as np
+import pytest
+import main
+import pumps
+import pipes
+import heat_exchangers
+import solvers
+import sweep
+import pump_index
+import catalogs
+from conftest import check_optimal
+
+#Built in catalogs and their columns
+builtin = {
+    "pumps": (pumps.pumps_dict, catalogs.pump_columns),
+    "pipes": (pipes.pipes_dict, catalogs.pipe_columns),
+    "heat_exchangers": (heat_exchangers.heat_exchangers_dict, catalogs.heat_exchanger_columns),
+}
+
+#Write a catalog to a CSV file with a header row
+def write_csv(path, catalog, columns):
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(list(columns))
+        writer.writerows(zip(*[np.asarray(catalog[name]).tolist() for name in columns]))
+
+#Write rows of text to a CSV file as they are
+def write_rows(path, rows):
+    with open(path, "w", newline="") as file:
+        csv.writer(file).writerows(rows)
+
+@pytest.mark.parametrize("name", list(builtin))
+@pytest.mark.parametrize("format", ["csv", "npy"])
+def test_round_trip(name, format, tmp_path):
+    catalog, columns = builtin[name]
+    path = str(tmp_path / f"{name}.{format}")
+    if format == "csv":
+        write_csv(path, catalog, columns)
+    else:
+        catalogs.save_catalog(path, catalog, columns)
+
+    loaded = catalogs.load_catalog(path, columns)
+    assert list(loaded) == list(columns)
+    for column, kind in columns.items():
+        if kind is str:
+            assert np.asarray(loaded[column]).tolist() == list(catalog[column])
+        else:
+            assert np.array_equal(np.asarray(loaded[column], dtype=float), np.asarray(catalog[column], dtype=float))
+
+#The sweep gives the same optimal designs with the catalogs loaded from files as with the built in catalogs
+def test_sweep_with_loaded_catalogs(scalar, tmp_path):
+    loaded = {}
+    for name, (catalog, columns) in builtin.items():
+        write_csv(tmp_path / f"{name}.csv", catalog, columns)
+        loaded[name] = catalogs.load_catalog(str(tmp_path / f"{name}.csv"), columns)
+
+    index = pump_index.build_pump_index(loaded["pumps"], main.lifetime, main.electricity_price, main.discount_rate)
+    space = sweep.design_space(main.ODs, main.schedules, main.materials, loaded["heat_exchangers"])
+    solvers.set_pipe_catalog(loaded["pipes"])
+    try:
+        optimal = {}
+        for designs, chunk_optimal in sweep.sweep(space, main.sections, main.min_pressure, scalar["target"], main.lifetime, "substitution", index=index):
+            sweep.merge_optimal(optimal, chunk_optimal)
+    finally:
+        solvers.set_pipe_catalog(pipes.pipes_dict)
+    check_optimal(optimal, scalar["optimal"])
+
+def test_route():
+    assert catalogs.load_route(str(pathlib.Path(__file__).parent / "route.csv")) == [tuple(float(value) for value in section) for section in main.sections]
+
+#Catalogs which load_pumps rejects, and the part of the error which says why
+bad_pumps = {
+    "missing column": ([["ID", "RPM", "cost", "efficiency"], ["P1", "3500", "100", "0.8"]], "missing columns ['head']"),
+    "missing field": ([["ID", "RPM", "cost", "efficiency", "head"], ["P1", "3500", "100", "0.8", "20"], ["P2", "3500", "100"]], "bad value in column efficiency"),
+    "not a number": ([["ID", "RPM", "cost", "efficiency", "head"], ["P1", "3500", "cheap", "0.8", "20"]], "bad value in column cost"),
+    "not finite": ([["ID", "RPM", "cost", "efficiency", "head"], ["P1", "3500", "100", "0.8", "inf"]], "not finite"),
+    "out of range": ([["ID", "RPM", "cost", "efficiency", "head"], ["P1", "3500", "100", "1.5", "20"]], "column efficiency has values out of range"),
+}
+
+@pytest.mark.parametrize("case", list(bad_pumps))
+def test_bad_pumps(case, tmp_path):
+    rows, message = bad_pumps[case]
+    write_rows(tmp_path / "pumps.csv", rows)
+    with pytest.raises(ValueError, match=re.escape(message)):
+        catalogs.load_pumps(str(tmp_path / "pumps.csv"))
+
+def test_bad_pipes(tmp_path):
+    catalog = {name: list(values) + [values[0]] for name, values in pipes.pipes_dict.items()}
+    with pytest.raises(ValueError, match="not unique"):
+        catalogs.save_catalog(str(tmp_path / "pipes.npy"), catalog, catalogs.pipe_columns)
+
+def test_bad_npy(tmp_path):
+    np.save(tmp_path / "pumps.npy", np.zeros(3))
+    with pytest.raises(ValueError, match="structured array"):
+        catalogs.load_pumps(str(tmp_path / "pumps.npy"))
+
+def test_empty_route(tmp_path):
+    write_rows(tmp_path / "route.csv", [["z0", "z2", "adjacent"]])
+    with pytest.raises(ValueError, match="no sections"):
+        catalogs.load_route(str(tmp_path / "route.csv"))
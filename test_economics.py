@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+import main
+import pumps
+import pipes
+import heat_exchangers
+import solvers
+import grid
+import pump_index
+import economics
+from conftest import check_optimal
+
+#Hydraulic table of the inputs in main.py, built once for every test
+@pytest.fixture(scope="module")
+def table():
+    return economics.hydraulic_table(main.ODs, main.schedules, main.materials, heat_exchangers.heat_exchangers_dict, main.sections, main.min_pressure, pumps.pumps_dict, "substitution")
+
+#Key of the table of main.py with some of its inputs changed
+def key(**changes):
+    inputs = {"ODs": main.ODs, "schedules": main.schedules, "materials": main.materials, "heat_exchangers_dict": heat_exchangers.heat_exchangers_dict,
+              "sections": main.sections, "min_pressure": main.min_pressure, "pumps_dict": pumps.pumps_dict, "method": "substitution"}
+    inputs.update(changes)
+    return economics.table_key(**inputs)
+
+def test_economics(scalar, table):
+    results = economics.rank(table, scalar["target"], main.lifetime, main.electricity_price, main.discount_rate)
+    check_optimal(economics.optimal_designs(results), scalar["optimal"])
+
+#Ranking the table again for another lifetime and price of electricity gives the same results as evaluating the grid again
+@pytest.mark.parametrize("target", ["capital", "power", "cost"])
+def test_rank_again(table, target):
+    lifetime, price = 20, 0.3
+    results = economics.rank(table, target, lifetime, price, main.discount_rate)
+    index = pump_index.build_pump_index(pumps.pumps_dict, lifetime, price, main.discount_rate)
+    expected = grid.evaluate_grid(main.ODs, main.schedules, main.materials, heat_exchangers.heat_exchangers_dict, main.sections, main.min_pressure, target, lifetime, index, "substitution")
+    assert np.array_equal(results["reason"], expected["reason"])
+    assert np.array_equal(results["pumps"], expected["pumps"])
+    for name in ["total_capital_cost", "total_operating_cost", "total_lifetime_cost", "total_power"]:
+        assert np.allclose(results[name], expected[name], rtol=1e-9, equal_nan=True)
+
+def test_save_load(table, tmp_path):
+    path = str(tmp_path / "table.pkl")
+    assert economics.load_table(path, table["key"]) is None
+    economics.save_table(path, table)
+    loaded = economics.load_table(path, table["key"])
+    assert np.array_equal(loaded["pump_head"], table["pump_head"], equal_nan=True)
+    assert np.array_equal(loaded["position"], table["position"])
+    assert economics.load_table(path, key(method="secant")) is None
+
+#The key changes with anything the lengths and heads depend on, and only then
+def test_table_key(table):
+    assert key() == table["key"]
+    assert key(method="secant") != table["key"]
+    assert key(min_pressure=main.min_pressure + 1) != table["key"]
+
+    catalog = {name: list(values) for name, values in pipes.pipes_dict.items()}
+    catalog["roughness"] = [value * 2 for value in catalog["roughness"]]
+    solvers.set_pipe_catalog(catalog)
+    try:
+        assert key() != table["key"]
+    finally:
+        solvers.set_pipe_catalog(pipes.pipes_dict)
+    assert key() == table["key"]
@@ -0,0 +1,53 @@
+import pathlib
+import pytest
+import main
+import heat_exchangers
+import grid
+import sweep
+import sinks
+import economics
+from conftest import fields, check_optimal
+
+#Folder of the committed results, which were written by the scalar sweep with the settings in main.py
+folder = pathlib.Path(__file__).parent
+
+#Every design of the grid is the same as the design of the sweep, with the same pumps and totals
+def test_grid(scalar):
+    results = grid.evaluate_grid(main.ODs, main.schedules, main.materials, heat_exchangers.heat_exchangers_dict, main.sections, main.min_pressure, scalar["target"], main.lifetime, scalar["index"], "substitution")
+    designs = [grid.grid_design(results, position) for position in range(len(scalar["designs"]))]
+    for design, expected in zip(designs, scalar["designs"]):
+        assert [design[field] for field in ["reason", *fields[:4]]] == [expected[field] for field in ["reason", *fields[:4]]]
+        if expected["reason"] is None:
+            for field in fields[4:]:
+                assert design[field] == pytest.approx(expected[field], rel=1e-9)
+            assert [section[1:] for section in design["sections"]] == [section[1:] for section in expected["sections"]]
+            assert [section[0] for section in design["sections"]] == pytest.approx([section[0] for section in expected["sections"]], rel=1e-9)
+    check_optimal(sweep.optimal_designs(designs), scalar["optimal"])
+
+#The secant method converges to within the error threshold of the same slant, so the optima are the same designs
+def test_grid_secant(scalar):
+    results = grid.evaluate_grid(main.ODs, main.schedules, main.materials, heat_exchangers.heat_exchangers_dict, main.sections, main.min_pressure, scalar["target"], main.lifetime, scalar["index"], "secant")
+    optimal = economics.optimal_designs(results)
+    for key in sweep.objectives:
+        assert [optimal[key][field] for field in fields[:4]] == [scalar["optimal"][key][field] for field in fields[:4]]
+        assert optimal[key][key] == pytest.approx(scalar["optimal"][key][key], rel=1e-6)
+
+#The scalar sweep reproduces the committed results.txt (written with the power target) and the optimal results of its target
+def test_results_files(scalar, tmp_path):
+    if scalar["target"] == "power":
+        sink = sinks.TextSink(tmp_path / "results.txt")
+        for design in scalar["designs"]:
+            sink.write(design)
+        sink.close()
+        assert (tmp_path / "results.txt").read_text() == (folder / "results.txt").read_text()
+
+    path = tmp_path / f"optimal_{scalar['target']}_results.txt"
+    with open(path, "w") as file:
+        main.write_optimal(file, "Design that is optimized for capital cost:", scalar["optimal"]["total_capital_cost"])
+        file.write("\n\n\n")
+        main.write_optimal(file, "Design that is optimized for operating cost:", scalar["optimal"]["total_operating_cost"])
+        file.write("\n\n\n")
+        main.write_optimal(file, f"Design that is optimized for lifetime cost over {main.lifetime} years:", scalar["optimal"]["total_lifetime_cost"])
+        file.write("\n\n\n")
+        main.write_optimal(file, "Design that is optimized for power consumption:", scalar["optimal"]["total_power"])
+    assert path.read_text() == (folder / path.name).read_text()
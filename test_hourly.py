@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+import main
+import equations
+import heat_exchangers
+import grid
+import sweep
+import hourly
+
+#Simulate the inputs in main.py through a profile
+def simulate(scalar, profile, **options):
+    return hourly.simulate(main.ODs, main.schedules, main.materials, heat_exchangers.heat_exchangers_dict, main.sections, main.min_pressure, scalar["target"], main.lifetime, profile, scalar["index"], **options)
+
+#A profile at the constant demand of equations.py gives the same designs and totals as the grid, and no feasible design falls short
+def test_constant_profile(scalar):
+    results = simulate(scalar, np.full(48, equations.demand))
+    expected = grid.evaluate_grid(main.ODs, main.schedules, main.materials, heat_exchangers.heat_exchangers_dict, main.sections, main.min_pressure, scalar["target"], main.lifetime, scalar["index"], "substitution")
+    assert np.array_equal(results["reason"], expected["reason"])
+    assert np.array_equal(results["pumps"], expected["pumps"])
+    for key in sweep.objectives:
+        assert np.allclose(results[key], expected[key], rtol=1e-9, equal_nan=True)
+    feasible = results["reason"] == grid.FEASIBLE
+    assert not results["unmet_hours"][feasible].any() and not results["pressure_hours"][feasible].any()
+    assert np.allclose(results["energy"][feasible], 48 * results["total_power"][feasible], rtol=1e-9)
+
+def test_chunk_size(scalar):
+    profile = hourly.synthetic_profile()[:24 * 14]
+    whole = simulate(scalar, profile)
+    chunked = simulate(scalar, profile, chunk_size=50)
+    for name in ["reason", "pumps", "unmet_hours", "pressure_hours", "peak_power"]:
+        assert np.array_equal(whole[name], chunked[name], equal_nan=True)
+    for name in ["energy", *sweep.objectives]:
+        assert np.allclose(whole[name], chunked[name], rtol=1e-12, equal_nan=True)
+
+def test_synthetic_profile():
+    profile = hourly.synthetic_profile(years=2)
+    assert len(profile) == 2 * hourly.hours_per_year
+    assert profile.mean() == pytest.approx(equations.demand)
+    assert profile.max() > equations.demand > profile.min() > 0
+
+#Sizing at the peak hour leaves no design short of pump head in any hour, where sizing at the average flow does not
+def test_peak_sizing(scalar):
+    profile = hourly.synthetic_profile()[:24 * 14]
+    constant = simulate(scalar, profile)
+    peak = simulate(scalar, profile, sizing="peak")
+    assert not peak["unmet_hours"].any()
+    assert constant["unmet_hours"].any()
+
+def test_unknown_sizing(scalar):
+    with pytest.raises(ValueError, match="Unknown sizing"):
+        simulate(scalar, np.full(4, equations.demand), sizing="average")
@@ -0,0 +1,63 @@
+import json
+import pytest
+import main
+import heat_exchangers
+import sweep
+import instrument
+
+#Record from a clean start while the block below runs
+@pytest.fixture
+def recording():
+    instrument.reset()
+    instrument.enable()
+    yield
+    instrument.disable()
+    instrument.reset()
+
+def test_disabled():
+    instrument.reset()
+    instrument.count("designs")
+    instrument.record("iterations", [1, 2])
+    with instrument.stage("stage"):
+        pass
+    assert instrument.snapshot() == {"timers": {}, "counters": {}, "values": {}}
+
+def test_record(recording):
+    instrument.count("designs", 3)
+    instrument.count("designs")
+    instrument.record("iterations", [4, 2])
+    instrument.record("iterations", 9)
+    instrument.record("iterations", [])
+    assert instrument.counters == {"designs": 4}
+    assert instrument.values == {"iterations": [3, 15.0, 2.0, 9.0]}
+
+#Merging what another process recorded adds to the timers, counters, and values of this one
+def test_merge(recording):
+    instrument.count("designs", 2)
+    instrument.record("iterations", [5])
+    instrument.add_time("solve", 1.5)
+    instrument.merge({"timers": {"solve": [3, 0.5]}, "counters": {"designs": 1, "chunks": 1}, "values": {"iterations": [2, 3.0, 1.0, 2.0]}})
+    assert instrument.timers == {"solve": [4, 2.0]}
+    assert instrument.counters == {"designs": 3, "chunks": 1}
+    assert instrument.values == {"iterations": [3, 8.0, 1.0, 5.0]}
+
+#Workers of the sweep record their own chunks, which add up to what the serial sweep records
+def test_workers(scalar, recording):
+    space = sweep.design_space(main.ODs, main.schedules, main.materials, heat_exchangers.heat_exchangers_dict)
+    calls = {}
+    for workers in [1, 2]:
+        instrument.reset()
+        list(sweep.sweep(space, main.sections, main.min_pressure, scalar["target"], main.lifetime, workers=workers, chunk_size=50, index=scalar["index"]))
+        calls[workers] = {name: timer[0] for name, timer in instrument.timers.items() if name in ["solve_design", "solve_section"]}
+    assert calls[1] == calls[2]
+    assert calls[1]["solve_design"] == len(space)
+
+def test_save(recording, tmp_path):
+    with instrument.stage("stage"):
+        instrument.count("designs")
+    instrument.save(tmp_path / "instrument.json")
+    with open(tmp_path / "instrument.json") as file:
+        summary = json.load(file)
+    assert summary["timers"]["stage"]["calls"] == 1
+    assert summary["counters"] == {"designs": 1}
+    assert "caches" in summary
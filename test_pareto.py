@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+import pareto
+
+#Designs with the given objectives, some of them not feasible
+def designs(points, rng):
+    return [{"reason": None if rng.random() > 0.1 else "pump", "position": i, **dict(zip(pareto.objectives, point))} for i, point in enumerate(points.tolist())]
+
+#Positions of the feasible designs which no other feasible design dominates, by comparing every pair
+def brute_force(designs):
+    feasible = [design for design in designs if design["reason"] is None]
+    points = [[design[key] for key in pareto.objectives] for design in feasible]
+    front = []
+    for design, point in zip(feasible, points):
+        if not any(all(a <= b for a, b in zip(other, point)) and any(a < b for a, b in zip(other, point)) for other in points):
+            front.append(design["position"])
+    return front
+
+#The front is the same whatever the size of the blocks it is built in, with ties and duplicate points kept
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("block_size", [1, 7, 4096])
+def test_front(seed, block_size):
+    rng = np.random.default_rng(seed)
+    points = rng.integers(0, 6, (400, len(pareto.objectives))).astype(float)
+    points[:, 2] = points[:, 0] + points[:, 1]
+    added = designs(points, rng)
+    front = pareto.ParetoFront(block_size=block_size)
+    for design in added:
+        front.add(design)
+    assert [design["position"] for design in front.front()] == brute_force(added)
+
+def test_top():
+    rng = np.random.default_rng(0)
+    added = designs(rng.integers(0, 20, (200, len(pareto.objectives))).astype(float), rng)
+    front = pareto.ParetoFront(k=5)
+    for design in added:
+        front.add(design)
+    for key in pareto.objectives:
+        expected = sorted((design for design in added if design["reason"] is None), key=lambda design: (design[key], design["position"]))[:5]
+        assert [design["position"] for design in front.top(key)] == [design["position"] for design in expected]
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+import main
+import pumps
+import pump_index
+import benchmarks
+
+#Catalogs to build indexes of: the built in catalog, random catalogs, catalogs with many equal costs, efficiencies, and heads, and
+#catalogs where the cost rises with the efficiency so that every pump is on the envelope of lifetime costs
+def catalog(kind, seed):
+    rng = np.random.default_rng(seed)
+    if kind == "builtin":
+        return pumps.pumps_dict
+    n = int(rng.integers(1, 300))
+    pumps_dict = benchmarks.synthetic_pumps(n, rng)
+    if kind == "ties":
+        pumps_dict.update(cost=rng.choice([1000.0, 2000.0, 3000.0], n), efficiency=rng.choice([0.7, 0.8], n), head=rng.choice([10.0, 20.0, 30.0], n))
+    if kind == "rising":
+        pumps_dict.update(efficiency=np.sort(rng.uniform(0.5, 0.95, n)), cost=np.linspace(1000, 60000, n) ** 1.3)
+    return pumps_dict
+
+#The pump picked from the index is the one a scan of the whole catalog picks, for every target, at heads on, between, and
+#outside the heads of the catalog
+@pytest.mark.parametrize("kind", ["builtin", "random", "ties", "rising"])
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("target", ["cost", "power"])
+def test_select_pump(kind, seed, target):
+    pumps_dict = catalog(kind, seed)
+    index = pump_index.build_pump_index(pumps_dict, main.lifetime)
+    head = np.asarray(pumps_dict["head"], dtype=float)
+    heads = np.concatenate([head, head - 0.5, head + 0.5, np.random.default_rng(seed).uniform(0, 130, 200)])
+
+    selected = pump_index.select_pump(index, heads, target)
+    expected = [benchmarks.scan_pumps(pumps_dict, pump_head, target, main.lifetime) for pump_head in heads.tolist()]
+    assert selected.tolist() == expected
+    assert [pump_index.select_pump(index, pump_head, target) for pump_head in heads[:20].tolist()] == expected[:20]
+
+#Every piece of the envelope kept for a position lies between the heads of the catalog on either side of it
+def test_envelope_pieces():
+    pumps_dict = catalog("rising", 0)
+    index = pump_index.build_pump_index(pumps_dict, main.lifetime)
+    offsets = index["cost_offsets"]
+    assert offsets[-1] == len(index["cost_pieces"]) == len(index["cost_breaks"])
+    for i in range(len(index["head"])):
+        breaks = index["cost_breaks"][offsets[i]:offsets[i + 1]]
+        assert len(breaks) > 0 and breaks[-1] >= index["head"][i]
+        assert np.all(np.diff(breaks) > 0)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+import main
+import heat_exchangers
+import grid
+import instrument
+
+#Results of the grid for a route, evaluated from scratch
+def evaluate(sections, scalar, method="substitution"):
+    return grid.evaluate_grid(main.ODs, main.schedules, main.materials, heat_exchangers.heat_exchangers_dict, sections, main.min_pressure, scalar["target"], main.lifetime, scalar["index"], method)
+
+#Check that two sets of grid results are the same
+def check_results(results, expected):
+    assert set(results) == set(expected)
+    for key, value in expected.items():
+        if isinstance(value, np.ndarray):
+            assert np.array_equal(results[key], value, equal_nan=value.dtype.kind == "f"), key
+        else:
+            assert results[key] == value, key
+
+#Sections solved and reused while the block below runs
+@pytest.fixture
+def counted():
+    instrument.reset()
+    instrument.enable()
+    yield instrument.counters
+    instrument.disable()
+    instrument.reset()
+
+#A route of any number of sections, with sections repeated, gives the same designs as solving each section on its own
+def test_route(scalar):
+    sections = main.sections + main.sections[:2] + [(80, 70, 300)]
+    results = evaluate(sections, scalar)
+    assert results["total_length"].shape == (len(scalar["designs"]),)
+    parts = [evaluate([section], scalar) for section in sections]
+    feasible = results["reason"] == grid.FEASIBLE
+    assert np.all(feasible <= np.all([part["reason"] == grid.FEASIBLE for part in parts], axis=0))
+    for key in ["total_length", "total_power", "total_operating_cost"]:
+        assert np.allclose(results[key][feasible], sum(part[key] for part in parts)[feasible], rtol=1e-12)
+
+#The incremental grid only solves the sections which change, and gives the same results as evaluating the route again
+def test_incremental(scalar, counted):
+    incremental = grid.IncrementalGrid(main.ODs, main.schedules, main.materials, heat_exchangers.heat_exchangers_dict, main.min_pressure, scalar["target"], main.lifetime, scalar["index"])
+    check_results(incremental.evaluate(main.sections), evaluate(main.sections, scalar))
+    assert counted["sections_solved"] == len(main.sections)
+
+    sections = list(main.sections)
+    sections[2] = (93, 80, 650)
+    check_results(incremental.update(2, sections[2]), evaluate(sections, scalar))
+    assert counted["sections_solved"] == len(main.sections) + 1
+    assert counted["sections_reused"] == len(main.sections) - 1
+
+    check_results(incremental.evaluate(sections + [sections[0]]), evaluate(sections + [sections[0]], scalar))
+    assert counted["sections_solved"] == len(main.sections) + 1
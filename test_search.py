@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+import main
+import heat_exchangers
+import sweep
+import search
+import pareto
+import pump_index
+import benchmarks
+from conftest import check_optimal
+
+#Designs on the pareto front of a list of designs, in the order they were added
+def front(designs):
+    pareto_front = pareto.ParetoFront()
+    for design in designs:
+        pareto_front.add(design)
+    return [(design["OD"], design["schedule"], design["material"], design["heat_exchanger"]) for design in pareto_front.front()]
+
+def test_optimal(scalar):
+    designs, optimal, stats = search.branch_and_bound(main.ODs, main.schedules, main.materials, heat_exchangers.heat_exchangers_dict, main.sections, main.min_pressure, scalar["target"], main.lifetime, "substitution", scalar["index"])
+    assert stats["designs"] == len(scalar["designs"])
+    assert stats["solved"] + stats["infeasible"] + stats["dominated"] == stats["designs"]
+    check_optimal(optimal, scalar["optimal"])
+
+#Designs which are on the front without being optimal in any one objective are still solved when the front is kept
+@pytest.mark.parametrize("seed", range(10))
+def test_front(seed):
+    rng = np.random.default_rng(seed)
+    pumps_dict = benchmarks.synthetic_pumps(int(rng.integers(8, 60)), rng)
+    heat_exchangers_dict = benchmarks.synthetic_heat_exchangers(int(rng.integers(2, 6)), rng)
+    index = pump_index.build_pump_index(pumps_dict, main.lifetime)
+    ODs = list(np.linspace(1, 6, 21))
+    space = sweep.design_space(ODs, main.schedules, main.materials, heat_exchangers_dict)
+
+    expected = [design for designs, optimal in sweep.sweep(space, main.sections, main.min_pressure, main.target, main.lifetime, index=index) for design in designs]
+    designs, optimal, stats = search.branch_and_bound(ODs, main.schedules, main.materials, heat_exchangers_dict, main.sections, main.min_pressure, main.target, main.lifetime, "substitution", index, keep_front=True)
+    assert front(designs) == front(expected)
+    check_optimal(optimal, sweep.optimal_designs(expected))
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+import main
+import pumps
+import heat_exchangers
+import grid
+import economics
+import pump_index
+import sweep
+import sensitivity
+
+#Arguments of the sensitivity analysis of the inputs in main.py
+arguments = (main.ODs, main.schedules, main.materials, heat_exchangers.heat_exchangers_dict, main.sections, main.min_pressure, "cost", pumps.pumps_dict)
+
+#Scenarios at the point estimates of every input give the same designs and totals as the grid
+def test_point_estimates():
+    n = 3
+    samples = {"density": np.ones(n), "viscosity": np.ones(n), "flow": np.ones(n), "roughness": np.ones(n),
+               "electricity_price": np.full(n, main.electricity_price), "lifetime": np.full(n, float(main.lifetime))}
+    pipes = grid.grid_pipes(main.ODs, main.schedules, main.materials, heat_exchangers.heat_exchangers_dict, main.min_pressure)
+    evaluated = sensitivity.evaluate_scenarios(pipes, main.sections, main.min_pressure, "cost", economics.pump_table(pumps.pumps_dict), samples, "substitution", main.discount_rate)
+
+    index = pump_index.build_pump_index(pumps.pumps_dict, main.lifetime, main.electricity_price, main.discount_rate)
+    expected = grid.evaluate_grid(main.ODs, main.schedules, main.materials, heat_exchangers.heat_exchangers_dict, main.sections, main.min_pressure, "cost", main.lifetime, index, "substitution")
+    for scenario in range(n):
+        assert np.array_equal(evaluated["reason"][:, scenario], expected["reason"])
+        for key in sweep.objectives:
+            assert np.allclose(evaluated[key][:, scenario], expected[key], rtol=1e-9, equal_nan=True)
+
+#Only running counts are kept between chunks, so the size of the chunks does not change the results
+def test_chunk_size():
+    whole = sensitivity.sensitivity(*arguments, 24, seed=1, chunk_size=24)
+    chunked = sensitivity.sensitivity(*arguments, 24, seed=1, chunk_size=5)
+    for name in ["feasible", "none_feasible", "min", "max", "histogram"]:
+        assert np.array_equal(whole[name], chunked[name])
+    for key in sweep.objectives:
+        assert np.array_equal(whole["optimal"][key], chunked["optimal"][key])
+    for name in ["sum", "sum_squares"]:
+        assert np.allclose(whole[name], chunked[name], rtol=1e-12)
+
+def test_summary():
+    scenarios = 40
+    results = sensitivity.sensitivity(*arguments, scenarios, seed=2)
+    rows = sensitivity.summary(results)
+    assert len(rows) == len(results["designs"])
+
+    #Every scenario with a feasible design has exactly one optimal design for each objective
+    for key in sweep.objectives:
+        assert sum(row[f"optimal_{key}"] for row in rows) == pytest.approx(1 - results["none_feasible"] / scenarios)
+
+    for row in rows:
+        assert 0 <= row["feasible"] <= 1
+        if row["feasible"] == 0:
+            assert row["lifetime_cost_mean"] is None and row["lifetime_cost_p50"] is None
+        else:
+            ordered = [row[f"lifetime_cost_{name}"] for name in ["min", "p5", "p50", "p95", "max"]]
+            assert ordered == sorted(ordered)
+            assert row["lifetime_cost_min"] <= row["lifetime_cost_mean"] <= row["lifetime_cost_max"]
+
+def test_sample_inputs():
+    samples = sensitivity.sample_inputs(1000, seed=3)
+    assert set(samples) == set(sensitivity.inputs)
+    assert ((samples["electricity_price"] >= 0.10) & (samples["electricity_price"] <= 0.25)).all()
+    assert np.array_equal(sensitivity.sample_inputs(1000, seed=3)["flow"], samples["flow"])
+    assert np.array_equal(sensitivity.sample_inputs(4, inputs={"lifetime": ("fixed", 40)})["lifetime"], np.full(4, 40.0))
+    with pytest.raises(ValueError, match="Unknown distribution"):
+        sensitivity.sample_inputs(4, inputs={"lifetime": ("triangular", 30, 70)})
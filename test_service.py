@@ -0,0 +1,85 @@
+import asyncio
+import json
+import math
+import socket
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import main
+import sweep
+import service
+from conftest import fields
+
+#Built in catalogs and the route in main.py, without building the hydraulic table up front
+@pytest.fixture(autouse=True)
+def loaded():
+    service.load(warm=False)
+    yield
+    service.load(warm=False)
+
+def test_ping():
+    assert service.answer({"id": 1, "op": "ping"}) == {"id": 1, "ok": True, "result": "pong"}
+
+def test_errors():
+    assert service.answer({"id": 2, "op": "unknown"}) == {"id": 2, "ok": False, "error": "ValueError: Unknown op: unknown"}
+    assert not service.answer({"id": 3, "op": "evaluate", "OD": 4, "schedule": 40, "material": "PVC", "heat_exchanger": "missing"})["ok"]
+    assert not service.answer({"id": 4, "op": "best", "objective": "missing"})["ok"]
+
+def test_evaluate(scalar):
+    design = next(design for design in scalar["designs"] if design["reason"] is None)
+    request = {"op": "evaluate", "target": scalar["target"], **{field: design[field] for field in fields[:4]}}
+    result = service.answer(request)["result"]
+    for field in fields:
+        assert result[field] == design[field]
+
+def test_best(scalar):
+    result = service.answer({"op": "best", "target": scalar["target"]})["result"]
+    assert result["designs"] == len(scalar["designs"])
+    assert result["feasible"] == sum(design["reason"] is None for design in scalar["designs"])
+    for key in sweep.objectives:
+        assert [result["optimal"][key][field] for field in fields[:4]] == [scalar["optimal"][key][field] for field in fields[:4]]
+        assert result["optimal"][key][key] == pytest.approx(scalar["optimal"][key][key], rel=1e-9)
+
+#Values which are not finite become null, so that every response is valid JSON
+def test_plain():
+    assert service.plain({"a": [math.nan, math.inf, 1.5], 2: (1, "b")}) == {"a": [None, None, 1.5], "2": [1, "b"]}
+
+#The route of main.route_file is the default sections of every request
+def test_route(tmp_path):
+    path = tmp_path / "route.csv"
+    path.write_text("z0,z2,adjacent\n72,63,800\n63,93,400\n")
+    service.load(warm=False, route_file=str(path))
+    assert service.settings({})["sections"] == [(72.0, 63.0, 800.0), (63.0, 93.0, 400.0)]
+    assert service.settings({"sections": [[72, 63, 800]]})["sections"] == [(72.0, 63.0, 800.0)]
+
+#Every line is answered with the id of its request, bad lines included
+def test_serve_lines():
+    lines = [json.dumps({"id": i, "op": "ping"}) + "\n" for i in range(5)] + ["not json\n", "\n", ""]
+    responses = []
+
+    async def readline():
+        return lines.pop(0)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        asyncio.run(service.serve_lines(readline, responses.append, executor))
+    responses = [json.loads(response) for response in responses]
+    assert sorted(response["id"] for response in responses if response["ok"]) == list(range(5))
+    assert [response["id"] for response in responses if not response["ok"]] == [None]
+
+#Only sockets which nothing listens on are removed
+def test_remove_stale_socket(tmp_path):
+    path = tmp_path / "file"
+    path.write_text("data")
+    with pytest.raises(FileExistsError):
+        service.remove_stale_socket(str(path))
+    assert path.exists()
+
+    path = str(tmp_path / "service.sock")
+    server = socket.socket(socket.AF_UNIX)
+    server.bind(path)
+    server.listen()
+    with pytest.raises(FileExistsError):
+        service.remove_stale_socket(path)
+    server.close()
+    service.remove_stale_socket(path)
+    assert not (tmp_path / "service.sock").exists()
+    service.remove_stale_socket(path)
@@ -0,0 +1,58 @@
+import csv
+import json
+import math
+import numpy as np
+import pytest
+import main
+import sinks
+
+#Write designs to a sink of the given format
+def write(format, path, designs, widths=None):
+    sink = sinks.open_sink(format, str(path), len(main.sections), widths)
+    for design in designs:
+        sink.write(design)
+    sink.close()
+
+#The design records of the sweep, with the missing values of the designs which are not feasible as None
+def records(designs):
+    return [sinks.design_record(design, len(main.sections)) for design in designs]
+
+def test_csv(scalar, tmp_path):
+    write("csv", tmp_path / "results.csv", scalar["designs"])
+    with open(tmp_path / "results.csv", newline="") as file:
+        rows = list(csv.DictReader(file))
+    expected = records(scalar["designs"])
+    assert len(rows) == len(expected)
+    for row, record in zip(rows, expected):
+        assert row == {key: "" if value is None else str(value) for key, value in record.items()}
+
+def test_jsonl(scalar, tmp_path):
+    write("jsonl", tmp_path / "results.jsonl", scalar["designs"])
+    with open(tmp_path / "results.jsonl") as file:
+        assert [json.loads(line) for line in file] == records(scalar["designs"])
+
+def test_npy(scalar, tmp_path):
+    write("npy", tmp_path / "results.npy", scalar["designs"])
+    array = np.load(tmp_path / "results.npy", mmap_mode="r")
+    assert len(array) == len(scalar["designs"])
+    for row, record in zip(array, records(scalar["designs"])):
+        assert (row["OD"], row["schedule"], row["material"], row["heat_exchanger"], row["reason"]) == (record["OD"], record["schedule"], record["material"], record["heat_exchanger"], record["reason"] or "")
+        total = record["total_lifetime_cost"]
+        assert math.isnan(row["total_lifetime_cost"]) if total is None else row["total_lifetime_cost"] == total
+        assert list(row["section_pump"]) == [record[f"section{i + 1}_pump"] or "" for i in range(len(main.sections))]
+    assert not (tmp_path / "results.npy.part").exists()
+
+#Text longer than the default fields is kept whole when the sink is sized from the catalogs, and is never cut off otherwise
+def test_npy_widths(scalar, tmp_path):
+    design = next(design for design in scalar["designs"] if design["reason"] is None)
+    pump_id = "GRUNDFOS-NBG-125-100-315"
+    design = dict(design, heat_exchanger="H" * 40, sections=[(length, pump_id, rpm) for length, _, rpm in design["sections"]])
+
+    widths = sinks.string_widths(main.materials, [design["heat_exchanger"]], [pump_id])
+    write("npy", tmp_path / "results.npy", [design], widths)
+    array = np.load(tmp_path / "results.npy")
+    assert array["heat_exchanger"][0] == design["heat_exchanger"]
+    assert list(array["section_pump"][0]) == [pump_id] * len(main.sections)
+
+    with pytest.raises(ValueError):
+        write("npy", tmp_path / "narrow.npy", [design])
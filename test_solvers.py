@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+import main
+import equations
+import solvers
+
+#Pipes from the smallest to the largest OD of each schedule and material, including ODs where section 0 diverges
+def pipes():
+    ODs = np.linspace(1, 6, 101)
+    diameter, roughness = [], []
+    for schedule in main.schedules:
+        for material in main.materials:
+            values = solvers.pipe_properties(ODs, schedule, material)
+            diameter.append(values[0])
+            roughness.append(np.broadcast_to(values[1], ODs.shape))
+    diameter, roughness = np.concatenate(diameter), np.concatenate(roughness)
+    p0 = np.full(diameter.shape, main.min_pressure / (equations.density * equations.gravity))
+    return diameter, roughness, p0
+
+#The batch gives the same lengths as solving one design at a time, and diverges for the same designs
+@pytest.mark.parametrize("method", ["substitution", "secant"])
+@pytest.mark.parametrize("section", main.sections)
+def test_batch(method, section):
+    diameter, roughness, p0 = pipes()
+    z0, z2, adjacent = section
+    length, y, diverged, iterations = solvers.solve_section0_batch(diameter, roughness, p0, z0, adjacent, method)
+    assert diverged.any() and not diverged.all()
+
+    for i in range(len(diameter)):
+        try:
+            expected = solvers.solve_section0(float(diameter[i]), float(roughness[i]), float(p0[i]), z0, adjacent, False, method)[0]
+        except solvers.DivergenceError:
+            assert diverged[i]
+            continue
+        assert not diverged[i]
+        assert length[i] == pytest.approx(expected, rel=1e-12)
+
+#The secant method diverges for the same designs as substitution, and the slant it finds is a fixed point of equation 1 to
+#within the error threshold, in fewer iterations
+@pytest.mark.parametrize("section", main.sections)
+def test_secant(section):
+    diameter, roughness, p0 = pipes()
+    z0, z2, adjacent = section
+    substitution = solvers.solve_section0_batch(diameter, roughness, p0, z0, adjacent, "substitution")
+    length, y, diverged, iterations = solvers.solve_section0_batch(diameter, roughness, p0, z0, adjacent, "secant")
+    assert np.array_equal(diverged, substitution[2])
+    converged = ~diverged
+    residual = solvers.slant(y[converged], diameter[converged], roughness[converged], p0[converged], z0, adjacent) - y[converged]
+    assert np.all(np.abs(np.where(y[converged] > 0, residual, np.maximum(residual, 0))) <= solvers.error_threshold)
+    assert iterations[converged].sum() < substitution[3][converged].sum()
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        solvers.solve_section0_batch([0.1], [0.0001], [10.0], 72, 800, "newton")
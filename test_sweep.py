@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+import main
+import heat_exchangers
+import pipes
+import solvers
+import sweep
+
+#Designs and optimal designs of a sweep of the design space in main.py
+def run(target, index, **options):
+    space = sweep.design_space(main.ODs, main.schedules, main.materials, heat_exchangers.heat_exchangers_dict)
+    designs, optimal = [], {}
+    for chunk, chunk_optimal in sweep.sweep(space, main.sections, main.min_pressure, target, main.lifetime, "substitution", index=index, **options):
+        designs.extend(chunk)
+        sweep.merge_optimal(optimal, chunk_optimal)
+    return designs, optimal
+
+#The designs and optimal designs are the same whatever the number of workers and size of the chunks
+@pytest.mark.parametrize("workers, chunk_size", [(2, None), (3, 7), (2, 1)])
+def test_workers(scalar, workers, chunk_size):
+    designs, optimal = run(scalar["target"], scalar["index"], workers=workers, chunk_size=chunk_size)
+    assert designs == scalar["designs"]
+    assert optimal == scalar["optimal"]
+
+#Workers solve with the pipe catalog in use rather than the built in one
+def test_workers_pipe_catalog(scalar):
+    catalog = {name: np.asarray(values) for name, values in pipes.pipes_dict.items()}
+    catalog["cost_slope"] = catalog["cost_slope"] * 2
+    solvers.set_pipe_catalog(catalog)
+    try:
+        assert run(scalar["target"], scalar["index"], workers=2) == run(scalar["target"], scalar["index"], workers=1)
+    finally:
+        solvers.set_pipe_catalog(pipes.pipes_dict)